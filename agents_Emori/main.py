@@ -1,9 +1,14 @@
 from main_graph.main_graph import create_main_graph
 from shared.state import MainState
+from database.milvus_cloud_db.retriever_startup import warm_up_retrievers
+from database.milvus_cloud_db.retrieval_depth import get_retrieval_telemetry
 
 def interactive_chat():
     app = create_main_graph()
     
+    # Load embedding model and connect to Zilliz while the user types
+    warm_up_retrievers(background=True)
+    
     print("Mental Health Chat Companion - Emori")
     print("Enter 'quit' to exit\n")
     
@@ -35,6 +40,9 @@ def interactive_chat():
         except Exception as e:
             print(f"Error: {e}")
             print("Please try again.")
+    
+    # Hits fetched vs. used per retrieval node over the session
+    get_retrieval_telemetry().show()
 
 if __name__ == "__main__":
     interactive_chat()
\ No newline at end of file
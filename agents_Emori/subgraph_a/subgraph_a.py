@@ -1,8 +1,10 @@
 from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableLambda
 from shared.state import MainState
 from .subgraph_a_nodes import (  # Changed from path_a_nodes
     filter_generator_node,
     semantic_search_a_node,
+    asemantic_search_a_node,
     grading_document_node,
     filter_document_node
 )
@@ -13,7 +15,8 @@ def create_subgraph_a():
     
     # Add nodes
     workflow.add_node("filter_generator", filter_generator_node)
-    workflow.add_node("semantic_search_a", semantic_search_a_node)
+    # Sync under invoke, async under ainvoke
+    workflow.add_node("semantic_search_a", RunnableLambda(semantic_search_a_node, afunc=asemantic_search_a_node))
     workflow.add_node("grading_document", grading_document_node)
     workflow.add_node("filter_document", filter_document_node)
     
@@ -7,29 +7,68 @@ sys.path.append('/app')
 from shared.state import MainState
 from shared.schemas import FilterCategory, DocumentGrade, GradingDocument
 from llm_model.llm import llm_model
-from database.milvus_cloud_db.zilliz_retriever import semantic_search, initialize_retriever
+from database.milvus_cloud_db.zilliz_retriever import semantic_search, asemantic_search, configure_retriever
+from database.milvus_cloud_db.retrieval_depth import get_retrieval_telemetry
+from database.milvus_cloud_db.retriever_startup import register_warm_up
 from bson import ObjectId
 from services.crud  import create_mental_health_db
+from services.document_grader import build_document_grader
 
 # Load environment variables
 zilliz_uri = os.getenv("ZILLIZ_URI")
 zilliz_token = os.getenv("ZILLIZ_TOKEN")
+local_index_path = os.getenv("LOCAL_INDEX_PATH")  # optional offline snapshot
+embedding_backend = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | onnx-int8
+sparse_index_path = os.getenv("SPARSE_INDEX_PATH")  # optional BM25 index file for hybrid mode
+codec_path = os.getenv("VECTOR_CODEC_PATH")  # optional storage codec of the collection
 
-# Initialize retriever
-initialize_retriever(
+# Path A retrieval: dense | hybrid (dense + BM25 fused by reciprocal rank)
+SEARCH_MODE_A = os.getenv("SEARCH_MODE_A", "dense")
+
+# Register retriever settings - model load and connection happen on first search or warm-up
+configure_retriever(
     zilliz_uri=zilliz_uri,
     zilliz_token=zilliz_token,
     collection_name= "mental_health_emori", # dont change this
     embedding_model= "all-MiniLM-L6-v2",
-    use_cuda= False
+    use_cuda= False,
+    local_index_path= local_index_path,
+    backend= embedding_backend,
+    sparse_index_path= sparse_index_path,
+    codec_path= codec_path,
+    hybrid= SEARCH_MODE_A == "hybrid"  # BM25 index built at warm-up
 )
 
+# Per-call timeout (seconds) for async retrieval under ainvoke
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+
+# Retrieval depth - grading_document_node grades every result it receives
+SEARCH_TOP_K_A = int(os.getenv("SEARCH_TOP_K_A", "15"))
+
 #when LLM fails to grade a document:
 GRADING_CONFIG = {
     "text_preview_length": 250, # controls how much document text is shown to the LLM for grading.
     "default_grade": 0 # Uses 70
 }
 
+# Relevance grader: llm | cross-encoder (local CPU, LLM fallback). The LLM stays the default -
+# switch once CROSS_ENCODER_LOGIT_SHIFT / SCALE are fitted with calibrate_cross_encoder, otherwise
+# the cross-encoder grades are not on the LLM's scale and the threshold of 50 keeps other documents
+document_grader = build_document_grader(
+    os.getenv("DOCUMENT_GRADER", "llm"),
+    llm=llm_model,
+    response_schema=GradingDocument,
+    text_preview_length=GRADING_CONFIG["text_preview_length"],
+    model_name=os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    backend=os.getenv("CROSS_ENCODER_BACKEND", "torch"),  # torch | onnx | onnx-int8
+    # grade = 1 + 99 * sigmoid((logit - shift) / scale); fit with calibrate_cross_encoder
+    logit_shift=float(os.getenv("CROSS_ENCODER_LOGIT_SHIFT", "0")),
+    logit_scale=float(os.getenv("CROSS_ENCODER_LOGIT_SCALE", "1"))
+)
+
+# Cross-encoder loads with the retrievers at warm-up instead of on the first grading
+register_warm_up("document_grader", document_grader.warm_up)
+
 def filter_generator_node(state: MainState) -> MainState:
     try:
         query = state["user_query"]
@@ -69,7 +108,35 @@ def semantic_search_a_node(state: MainState) -> MainState:
         filter_value = state.get("label")  # Fixed field name
         
         filters = {"category": [filter_value]}
-        semantic_result = semantic_search(query, top_k=15, filters=filters, threshold=0.0)
+        # Only id and text are used downstream - skip the other payload fields
+        semantic_result = semantic_search(query, top_k=SEARCH_TOP_K_A, filters=filters, threshold=0.0,
+                                          output_fields=["id", "text"], mode=SEARCH_MODE_A,
+                                          node="semantic_search_a")
+        
+        result = [{'id': item['id'], 'text': item['text']} for item in semantic_result]
+        
+        if result:
+            print(f"found {len(result)} results for {filter_value}")
+        else:
+            print("no search results found")
+            
+        return {"semantic_search_a_results": result}
+        
+    except Exception as e:
+        print(f"search failed: {e}")
+        return {"semantic_search_a_results": []}
+
+
+# Async variant used under ainvoke - does not block the event loop
+async def asemantic_search_a_node(state: MainState) -> MainState:
+    try:
+        query = state["user_query"]
+        filter_value = state.get("label")
+        
+        filters = {"category": [filter_value]}
+        semantic_result = await asemantic_search(query, top_k=SEARCH_TOP_K_A, filters=filters, threshold=0.0,
+                                                 timeout=SEARCH_TIMEOUT, output_fields=["id", "text"],
+                                                 mode=SEARCH_MODE_A, node="semantic_search_a")
         
         result = [{'id': item['id'], 'text': item['text']} for item in semantic_result]
         
@@ -94,19 +161,10 @@ def grading_document_node(state: MainState) -> MainState:
             print("no documents to grade")
             return {"graded_documents": []}
         
-        # Build concise prompt
-        prompt = f"Rate document relevance to query (1-100):\nQuery: {query}\n\nDocuments:\n"
-        
-        for doc in documents:
-            text_preview = doc['text'][:GRADING_CONFIG["text_preview_length"]]
-            prompt += f"ID: {doc['id']}\nText: {text_preview}...\n\n"
-        
-        prompt += "Return grades for each document by ID."
-        
-        llm_response = llm_model.with_structured_output(GradingDocument).invoke(prompt)
+        get_retrieval_telemetry().record_consumed("semantic_search_a", len(documents))
         
-        # Create grade mapping
-        grade_map = {doc.id: doc.grade for doc in llm_response.grades}
+        # Create grade mapping (1-100 per document ID)
+        grade_map = document_grader.grade(query, documents)
         
         # Build final results with grades (no filtering yet)
         graded_docs = []
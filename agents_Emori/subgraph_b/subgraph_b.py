@@ -1,7 +1,9 @@
 from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableLambda
 from shared.state import MainState
 from .subgraph_b_nodes import (
     semantic_search_b_node,  # Fixed: actual function name
+    asemantic_search_b_node,
     intensity_score,
     top_k_filter,
     merge_path_B,
@@ -14,7 +16,8 @@ def create_subgraph_b():
     workflow = StateGraph(MainState)
     
     # Add nodes
-    workflow.add_node("semantic_search_b", semantic_search_b_node)
+    # Sync under invoke, async under ainvoke
+    workflow.add_node("semantic_search_b", RunnableLambda(semantic_search_b_node, afunc=asemantic_search_b_node))
     workflow.add_node("intensity_score", intensity_score)
     workflow.add_node("top_k_filter", top_k_filter)
     workflow.add_node("merge_path_B", merge_path_B)
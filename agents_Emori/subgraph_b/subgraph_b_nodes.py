@@ -4,7 +4,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 sys.path.append('/app')
-from database.milvus_cloud_db.zilliz_retriever_b import semantic_search_b, initialize_retriever_b
+from database.milvus_cloud_db.zilliz_retriever_b import semantic_search_b, asemantic_search_b, configure_retriever_b
+from database.milvus_cloud_db.retrieval_depth import get_retrieval_telemetry
 from shared.state import MainState
 from shared.schemas import SentimentScore, FilteredResult
 from pydantic import BaseModel, Field
@@ -12,18 +13,39 @@ from typing import Dict, Any, List
 from bson import ObjectId
 from llm_model.llm import llm_model
 from services.calculator_node import MentalHealthCalculator
+from services.label_voter import LabelVoter
 
 zilliz_uri_b = os.getenv("ZILLIZ_URI_B")
 zilliz_token_b = os.getenv("ZILLIZ_TOKEN_B")
+local_index_path_b = os.getenv("LOCAL_INDEX_PATH_B")  # optional offline snapshot
+embedding_backend = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | onnx-int8
+codec_path_b = os.getenv("VECTOR_CODEC_PATH_B")  # optional storage codec of the collection
 
-initialize_retriever_b(
+# Register retriever settings - built on first search or warm-up
+configure_retriever_b(
     zilliz_uri=zilliz_uri_b,
     zilliz_token=zilliz_token_b,
     collection_name="sentiment_collection_emori", # dont change this
     embedding_model="all-MiniLM-L6-v2",
-    use_cuda=False
+    use_cuda=False,
+    local_index_path=local_index_path_b,
+    backend=embedding_backend,
+    codec_path=codec_path_b
 )
 
+# Per-call timeout (seconds) for async retrieval under ainvoke
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+
+# Retrieval depth - top_k_filter is the only consumer; the label voter reads all of these results,
+# and they reach the LLM filter only when the vote escalates (LABEL_ESCALATION)
+TOP_K_FILTER_DEPTH = int(os.getenv("SEARCH_TOP_K_B", "5"))
+
+# Label vote for top_k_filter; escalation to the LLM filter: ambiguous | always | never
+label_voter = LabelVoter(
+    min_similarity=float(os.getenv("LABEL_MIN_SIMILARITY", "0.25")),
+    margin_threshold=float(os.getenv("LABEL_MARGIN_THRESHOLD", "0.15"))
+)
+LABEL_ESCALATION = os.getenv("LABEL_ESCALATION", "ambiguous")
 
 # Initialize calculator
 calculator = MentalHealthCalculator()
@@ -31,7 +53,7 @@ calculator = MentalHealthCalculator()
 def semantic_search_b_node(state: MainState) -> MainState:
     try:
         query = state["user_query"]
-        search_results = semantic_search_b(query, top_k=30)  
+        search_results = semantic_search_b(query, top_k=TOP_K_FILTER_DEPTH, node="semantic_search_b")
         
         result = [{
             'id': item['id'],
@@ -53,6 +75,29 @@ def semantic_search_b_node(state: MainState) -> MainState:
         return {"semantic_search_b_results": []}
 
 
+# Async variant used under ainvoke - does not block the event loop
+async def asemantic_search_b_node(state: MainState) -> MainState:
+    try:
+        query = state["user_query"]
+        search_results = await asemantic_search_b(query, top_k=TOP_K_FILTER_DEPTH, timeout=SEARCH_TIMEOUT,
+                                                  node="semantic_search_b")
+        
+        result = [{
+            'id': item['id'],
+            'similarity': item['similarity_score'],
+            'text': item['text'],
+            'status': item['status']
+        } for item in search_results]
+        
+        if result:
+            print("retrieved document from semantic search b node:")
+        
+        return {"semantic_search_b_results": result}
+    except Exception as e:
+        print(f"Semantic search B failed: {e}")
+        return {"semantic_search_b_results": []}
+
+
 def intensity_score(state: MainState) -> MainState:
     try:
         user_query = state["user_query"]
@@ -90,6 +135,45 @@ class FilteredResult(BaseModel):
 class FilterResponse(BaseModel):
     filtered_results: List[FilteredResult] = Field(description="List of filtered relevant results")
 
+# LLM relevance filter - only used when the label vote escalates
+def llm_top_k_filter(user_query: str, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    prompt = (
+        f"You are an expert mental health assistant. Carefully review the following search results in relation to the user's query:\n"
+        f"USER QUERY: {user_query}\n\n"
+        "Your task:\n"
+        "- Select only the results that are highly relevant to the user's current mental or emotional state based on the user query and the search results and the STATUS.\n"
+        "- Exclude any results that are off-topic, generic, or not directly related to the user's mental health.\n"
+        "- Pay special attention to any results that indicate a high risk of suicidal ideation, self-harm, severe depression, or anxiety that could lead to self-harm or suicide. If any such results are present, ensure they are included in the filtered list, even if they are few.\n"
+        "\nReturn ONLY the filtered results using the provided schema. Do not add any extra commentary or explanation.\n\n"
+        "SEARCH RESULTS:\n"
+    )
+    
+    for i, result in enumerate(search_results, 1):
+        prompt += (
+            f"{i}. ID: {result['id']}\n"
+            f"   Similarity: {result['similarity']:.3f}\n"
+            f"   Status: {result['status']}\n"
+            f"   Text: {result['text'][:350]}...\n\n"
+            
+        )
+    
+    # Create structured LLM with schema
+    structured_llm = llm_model.with_structured_output(FilterResponse)
+    
+    # Get structured response
+    llm_response = structured_llm.invoke(prompt)
+    
+    # Extract the filtered results from the structured response
+    filtered_results = []
+    for filtered_result in llm_response.filtered_results:
+        filtered_results.append({
+            "id": filtered_result.id,
+            "similarity": filtered_result.similarity,
+            "status": filtered_result.status,
+            "text": filtered_result.text
+        })
+    return filtered_results
+
 def top_k_filter(state: MainState) -> MainState:
     try:
         search_results = state.get("semantic_search_b_results", [])
@@ -98,43 +182,21 @@ def top_k_filter(state: MainState) -> MainState:
             print("no search results to filter")
             return {"top_k_results": []}
         
-        user_query = state["user_query"]
-        prompt = (
-            f"You are an expert mental health assistant. Carefully review the following search results in relation to the user's query:\n"
-            f"USER QUERY: {user_query}\n\n"
-            "Your task:\n"
-            "- Select only the results that are highly relevant to the user's current mental or emotional state based on the user query and the search results and the STATUS.\n"
-            "- Exclude any results that are off-topic, generic, or not directly related to the user's mental health.\n"
-            "- Pay special attention to any results that indicate a high risk of suicidal ideation, self-harm, severe depression, or anxiety that could lead to self-harm or suicide. If any such results are present, ensure they are included in the filtered list, even if they are few.\n"
-            "\nReturn ONLY the filtered results using the provided schema. Do not add any extra commentary or explanation.\n\n"
-            "SEARCH RESULTS:\n"
-        )
+        # Limit to the declared depth
+        consumed = search_results[:TOP_K_FILTER_DEPTH]
+        get_retrieval_telemetry().record_consumed("semantic_search_b", len(consumed))
+        
+        # Local similarity-weighted status vote - no LLM call unless the vote is ambiguous
+        vote = label_voter.vote(consumed)
+        filtered_results = vote["results"]
+        print(f"label vote: {vote['top_label']} (margin {vote['margin']:.2f})")
         
-        # Limit to first 5 results to avoid token limits
-        for i, result in enumerate(search_results[:5], 1):
-            prompt += (
-                f"{i}. ID: {result['id']}\n"
-                f"   Similarity: {result['similarity']:.3f}\n"
-                f"   Status: {result['status']}\n"
-                f"   Text: {result['text'][:350]}...\n\n"
-                
-            )
-        
-        # Create structured LLM with schema
-        structured_llm = llm_model.with_structured_output(FilterResponse)
-        
-        # Get structured response
-        llm_response = structured_llm.invoke(prompt)
-        
-        # Extract the filtered results from the structured response
-        filtered_results = []
-        for filtered_result in llm_response.filtered_results:
-            filtered_results.append({
-                "id": filtered_result.id,
-                "similarity": filtered_result.similarity,
-                "status": filtered_result.status,
-                "text": filtered_result.text
-            })
+        if LABEL_ESCALATION == "always" or (LABEL_ESCALATION == "ambiguous" and vote["escalate"]):
+            try:
+                filtered_results = llm_top_k_filter(state["user_query"], consumed)
+                print("ambiguous label vote - escalated to LLM filter")
+            except Exception as e:
+                print(f"LLM filter fail, keeping vote: {e}")
         
         print(f"TOP_k node filtered {len(filtered_results)} from {len(search_results)} results")
         print(filtered_results)
@@ -142,7 +204,7 @@ def top_k_filter(state: MainState) -> MainState:
         
     except Exception as e:
         print(f"filter fail: {e}")
-        # Fallback to top 3 results if LLM filtering fails
+        # Fallback to top 3 results if filtering fails
         fallback_results = search_results[:3]
         return {"top_k_results": fallback_results}
     
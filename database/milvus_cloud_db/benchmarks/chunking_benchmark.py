@@ -0,0 +1,179 @@
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+import numpy as np
+from database.milvus_cloud_db.text_processing import text_processing
+
+# Previous create_text_chunks - re-sums the overlap window after every chunk
+def legacy_create_text_chunks(text: str, chunk_size: int = 500, overlap_size: int = 50) -> List[str]:
+    if len(text) <= chunk_size:
+        return [text]
+
+    words = text.split()
+    chunks = []
+    current_chunk = []
+    current_length = 0
+
+    for word in words:
+        word_len = len(word) + 1
+        if current_length + word_len > chunk_size and current_chunk:
+            chunks.append(" ".join(current_chunk))
+
+            overlap_words = (
+                current_chunk[-overlap_size:]
+                if len(current_chunk) > overlap_size
+                else current_chunk
+            )
+            current_chunk = overlap_words + [word]
+            current_length = sum(len(w) + 1 for w in current_chunk)
+        else:
+            current_chunk.append(word)
+            current_length += word_len
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+# Random text with word lengths drawn around mean_word_length
+def generate_text(num_words: int, mean_word_length: float = 5.0, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    lengths = np.clip(rng.poisson(mean_word_length, num_words), 1, None)
+    letters = rng.integers(0, 26, int(lengths.sum())) + ord('a')
+    alphabet = letters.astype(np.uint8).tobytes().decode("ascii")
+
+    words = []
+    offset = 0
+    for length in lengths:
+        words.append(alphabet[offset:offset + length])
+        offset += length
+    return " ".join(words)
+
+# Legacy chunks repeated whole in the next one - a chunk (other than the last) of overlap_size
+# words or fewer, or any chunk with overlap_size 0 (current_chunk[-0:] is the whole chunk).
+# The new chunker caps these overlaps on purpose
+def legacy_is_degenerate(chunks: List[str], overlap_size: int) -> bool:
+    if overlap_size == 0:
+        return len(chunks) > 1
+    return any(len(chunk.split()) <= overlap_size for chunk in chunks[:-1])
+
+# Parity with the legacy chunker on random texts and settings - outside the degenerate case
+# the output must be byte-identical, otherwise every content-hash chunk ID changes and the
+# next ingestion_pipeline.sync re-uploads the collection
+def check_legacy_parity(num_texts: int = 1000, seed: int = 0) -> Dict:
+    rng = np.random.default_rng(seed)
+    result = {'checked': 0, 'degenerate': 0, 'mismatches': []}
+
+    for i in range(num_texts):
+        chunk_size = int(rng.integers(50, 1200))
+        overlap_size = int(rng.integers(0, 80))
+        text = generate_text(int(rng.integers(10, 3000)), float(rng.choice([4.0, 5.0, 8.0, 12.0])), seed=seed + i)
+
+        legacy = legacy_create_text_chunks(text, chunk_size, overlap_size)
+        if legacy_is_degenerate(legacy, overlap_size):
+            result['degenerate'] += 1
+            continue
+
+        result['checked'] += 1
+        if text_processing(chunk_size=chunk_size, overlap_size=overlap_size).create_text_chunks(text) != legacy:
+            result['mismatches'].append({'seed': seed + i, 'chunk_size': chunk_size, 'overlap_size': overlap_size})
+
+    print(f"Legacy parity: {result['checked']} texts checked, {len(result['mismatches'])} mismatches "
+          f"({result['degenerate']} degenerate texts skipped)")
+    return result
+
+def _time(fn, repeats: int) -> Dict:
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = fn()
+        seconds.append(time.perf_counter() - start)
+    return {'seconds': float(np.median(seconds)), 'chunks': len(chunks), 'output': chunks}
+
+# Legacy vs prefix-sum chunker on texts of growing size; long-word texts (chunks with
+# fewer words than the overlap) show the legacy re-sum at its worst
+def run_chunking_benchmark(sizes: List[int] = (10000, 100000, 1000000),
+                           chunk_size: int = 500,
+                           overlap_size: int = 50,
+                           repeats: int = 3,
+                           tokenizer_name: Optional[str] = None) -> Dict:
+    report = {'chunk_size': chunk_size, 'overlap_size': overlap_size, 'runs': [],
+              'parity': check_legacy_parity()}
+    chunker = text_processing(chunk_size=chunk_size, overlap_size=overlap_size)
+
+    for label, mean_word_length in (('english-like', 5.0), ('long-words', 12.0)):
+        for num_words in sizes:
+            text = generate_text(num_words, mean_word_length)
+            legacy = _time(lambda: legacy_create_text_chunks(text, chunk_size, overlap_size), repeats)
+            current = _time(lambda: chunker.create_text_chunks(text), repeats)
+
+            run = {
+                'text': label,
+                'words': num_words,
+                'chars': len(text),
+                'legacy_seconds': legacy['seconds'],
+                'legacy_chunks': legacy['chunks'],
+                'seconds': current['seconds'],
+                'chunks': current['chunks'],
+                'same_output': legacy['output'] == current['output'],
+                'degenerate': legacy_is_degenerate(legacy['output'], overlap_size),
+                'speedup': legacy['seconds'] / current['seconds'] if current['seconds'] else 0.0
+            }
+            report['runs'].append(run)
+            print(f"{label:>12} {num_words:>8} words: legacy {run['legacy_seconds']:.3f}s ({run['legacy_chunks']} chunks), "
+                  f"prefix-sum {run['seconds']:.3f}s ({run['chunks']} chunks), "
+                  f"{run['speedup']:.1f}x, same output: {run['same_output']}"
+                  f"{' (overlap capped)' if run['degenerate'] else ''}")
+
+    if tokenizer_name:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        token_chunker = text_processing(overlap_size=overlap_size, tokenizer=tokenizer, max_tokens=256)
+        text = generate_text(sizes[-1])
+        result = _time(lambda: token_chunker.create_text_chunks(text), 1)
+
+        # Character chunks of the legacy chunker that the encoder would truncate at 256 word-pieces
+        legacy_chunks = legacy_create_text_chunks(text, chunk_size, overlap_size)
+        legacy_tokens = [len(ids) for ids in tokenizer(legacy_chunks)['input_ids']]
+        token_counts = [len(ids) for ids in tokenizer(result['output'])['input_ids']]
+
+        report['token_aware'] = {
+            'tokenizer': tokenizer_name,
+            'words': len(text.split()),
+            'seconds': result['seconds'],
+            'chunks': result['chunks'],
+            'max_tokens': max(token_counts),
+            'legacy_chunks': len(legacy_chunks),
+            'legacy_truncated': sum(count > 256 for count in legacy_tokens),
+            'legacy_mean_tokens': float(np.mean(legacy_tokens)),
+            'mean_tokens': float(np.mean(token_counts))
+        }
+        print(f"Token-aware ({tokenizer_name}): {result['chunks']} chunks in {result['seconds']:.3f}s, "
+              f"max {report['token_aware']['max_tokens']} tokens (mean {report['token_aware']['mean_tokens']:.0f}); "
+              f"legacy: {report['token_aware']['legacy_truncated']}/{len(legacy_chunks)} chunks over 256 tokens "
+              f"(mean {report['token_aware']['legacy_mean_tokens']:.0f})")
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Legacy vs prefix-sum / token-aware chunking")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="Words per text")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tokenizer", help="Hugging Face tokenizer for the token-aware run, "
+                                            "e.g. sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    result = run_chunking_benchmark(args.sizes, args.chunk_size, args.overlap, args.repeats, args.tokenizer)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if result['parity']['mismatches']:
+        sys.exit(f"Chunker output differs from the legacy chunker: {result['parity']['mismatches'][:5]}")
\ No newline at end of file
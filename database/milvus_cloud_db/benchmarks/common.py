@@ -0,0 +1,74 @@
+import json
+from typing import Dict, List, Optional
+import numpy as np
+
+# Path A categories (one per search, chosen by filter_generator_node)
+CATEGORIES = ["research", "report", "conversation", "article"]
+
+# Path B labels (sentiment_collection_emori status values)
+STATUSES = ["Normal", "Depression", "Suicidal", "Anxiety", "Stress", "Bipolar", "Personality disorder"]
+
+# Random unit-length vectors
+def generate_vectors(num_rows: int, embedding_dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((num_rows, embedding_dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+# Generate random unit-length chunks spread evenly over the categories
+def generate_chunks(num_rows: int, embedding_dim: int, seed: int = 0) -> List[Dict]:
+    vectors = generate_vectors(num_rows, embedding_dim, seed)
+
+    return [{
+        'text': f"generated chunk {i}",
+        'embedding': vectors[i].tolist(),
+        'metadata': {
+            'chunk_id': f"bench_{i}",
+            'title': "benchmark",
+            'tags': ["benchmark"],
+            'category': [CATEGORIES[i % len(CATEGORIES)]],
+            'filename': "benchmark.csv"
+        }
+    } for i in range(num_rows)]
+
+# Load embedded chunks (text, embedding, metadata) from a JSON fixture
+def load_fixture_chunks(path: str) -> List[Dict]:
+    with open(path, "r") as f:
+        chunks = json.load(f)
+
+    if not chunks or 'embedding' not in chunks[0]:
+        raise ValueError(f"Fixture '{path}' must be a list of embedded chunks")
+    return chunks
+
+# Queries near stored vectors (noisy copies) - closer to real traffic than uniform noise
+def generate_queries(vectors: np.ndarray, num_queries: int, noise: float = 0.5, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), num_queries)
+    queries = vectors[picks] + noise * rng.standard_normal((num_queries, vectors.shape[1])).astype(np.float32) / np.sqrt(vectors.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries.astype(np.float32)
+
+# Exact cosine top-k ids (rows outside `mask` are excluded)
+def brute_force_top_k(vectors: np.ndarray,
+                      ids: List[str],
+                      query: np.ndarray,
+                      top_k: int,
+                      mask: Optional[np.ndarray] = None) -> List[str]:
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    scores = (vectors @ query) / (norms * max(float(np.linalg.norm(query)), 1e-12))
+
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+
+    top = np.argsort(-scores)[:top_k]
+    return [ids[i] for i in top if np.isfinite(scores[i])]
+
+# Latency percentiles in milliseconds
+def summarize_latencies(latencies: List[float]) -> Dict:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'mean_ms': float(np.mean(latencies_ms))
+    }
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import argparse
+from typing import Dict, List
+from pymilvus import MilvusClient
+import numpy as np
+from database.milvus_cloud_db.zilliz_uploader import zilliz_uploader, category_partition_name
+from database.milvus_cloud_db.benchmarks.common import CATEGORIES, generate_chunks, summarize_latencies
+
+# Time one search per query, cycling through the categories
+def _time_searches(client: MilvusClient,
+                   collection_name: str,
+                   queries: np.ndarray,
+                   top_k: int,
+                   partitioned: bool,
+                   metric_type: str) -> List[float]:
+    latencies = []
+
+    for i, query in enumerate(queries):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        partition_names = [category_partition_name(category), "_default"] if partitioned else None
+
+        start = time.perf_counter()
+        client.search(
+            collection_name=collection_name,
+            data=[query.tolist()],
+            limit=top_k,
+            search_params={"metric_type": metric_type},
+            output_fields=["id", "text"],
+            filter=f'array_contains(category, "{category}")',
+            partition_names=partition_names
+        )
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+# Compare a filtered scan over the whole collection with partition-scoped search
+def run_partition_benchmark(uri: str = "./partition_benchmark.db",
+                            num_rows: int = 20000,
+                            embedding_dim: int = 384,
+                            num_queries: int = 200,
+                            top_k: int = 10) -> Dict:
+    client = MilvusClient(uri)
+    chunks = generate_chunks(num_rows, embedding_dim)
+
+    collections = {'filtered_scan': "bench_filtered", 'partition_scoped': "bench_partitioned"}
+    for collection_name in collections.values():
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+
+    uploader = zilliz_uploader(None, None, collections['filtered_scan'], embedding_dim,
+                               client=client, partition_by_category=False)
+    uploader.upload_chunks(chunks, batch_size=1000)
+    zilliz_uploader(None, None, collections['partition_scoped'], embedding_dim,
+                    client=client, partition_by_category=True).upload_chunks(chunks, batch_size=1000)
+
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((num_queries, embedding_dim)).astype(np.float32)
+
+    report = {'num_rows': num_rows, 'embedding_dim': embedding_dim,
+              'num_queries': num_queries, 'top_k': top_k}
+    for mode, collection_name in collections.items():
+        client.load_collection(collection_name)
+        # Warm-up pass so the first timed search doesn't pay for loading
+        _time_searches(client, collection_name, queries[:10], top_k, mode == 'partition_scoped', uploader.metric_type)
+        report[mode] = summarize_latencies(
+            _time_searches(client, collection_name, queries, top_k, mode == 'partition_scoped', uploader.metric_type)
+        )
+
+    report['p50_speedup'] = report['filtered_scan']['p50_ms'] / report['partition_scoped']['p50_ms']
+
+    for collection_name in collections.values():
+        client.drop_collection(collection_name)
+
+    print(f"Filtered scan:    p50 {report['filtered_scan']['p50_ms']:.2f} ms, "
+          f"p95 {report['filtered_scan']['p95_ms']:.2f} ms")
+    print(f"Partition scoped: p50 {report['partition_scoped']['p50_ms']:.2f} ms, "
+          f"p95 {report['partition_scoped']['p95_ms']:.2f} ms")
+    print(f"p50 speedup: {report['p50_speedup']:.2f}x")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtered scan vs partition-scoped search latency")
+    parser.add_argument("--uri", default=os.getenv("BENCHMARK_MILVUS_URI", "./partition_benchmark.db"))
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    result = run_partition_benchmark(args.uri, args.rows, args.dim, args.queries, args.top_k)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
\ No newline at end of file
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from pymilvus import MilvusClient, DataType
+import pymilvus
+import numpy as np
+from database.milvus_cloud_db.embedding_provider import get_embedding_provider
+from database.milvus_cloud_db.zilliz_uploader import zilliz_uploader, index_metric_type
+from database.milvus_cloud_db.zilliz_retriever import zilliz_retriever
+from database.milvus_cloud_db.zilliz_retriever_b import zilliz_retriever_b
+from database.milvus_cloud_db.benchmarks.common import (
+    CATEGORIES, STATUSES, generate_chunks, generate_vectors, generate_queries,
+    load_fixture_chunks, brute_force_top_k, summarize_latencies
+)
+
+# Index builds and the search_params variants measured on each
+INDEX_CONFIGS = [
+    {'index_type': 'FLAT', 'params': {}, 'search_params': [{}]},
+    {'index_type': 'IVF_FLAT', 'params': {'nlist': 128}, 'search_params': [{'nprobe': 8}, {'nprobe': 32}]},
+    {'index_type': 'HNSW', 'params': {'M': 16, 'efConstruction': 200}, 'search_params': [{'ef': 32}, {'ef': 128}]},
+    {'index_type': 'AUTOINDEX', 'params': {}, 'search_params': [{'level': 1}, {'level': 3}]}
+]
+
+PATH_A_COLLECTION = "bench_knowledge_base"
+PATH_B_COLLECTION = "bench_sentiment"
+
+# Path B schema (sentiment_collection_emori) - labelled statements with a status field
+def create_path_b_collection(client: MilvusClient, collection_name: str, embedding_dim: int):
+    schema = client.create_schema()
+    schema.add_field("id", DataType.VARCHAR, max_length=200, is_primary=True)
+    schema.add_field("text", DataType.VARCHAR, max_length=65535)
+    schema.add_field("embedding", DataType.FLOAT_VECTOR, dim=embedding_dim)
+    schema.add_field("chunk_id", DataType.VARCHAR, max_length=100)
+    schema.add_field("total_chunks", DataType.INT64)
+    schema.add_field("chunk_index", DataType.INT64)
+    schema.add_field("status", DataType.VARCHAR, max_length=100)
+    schema.add_field("filename", DataType.VARCHAR, max_length=255)
+    schema.add_field("char_count", DataType.INT64)
+    schema.add_field("timestamp", DataType.INT64)
+
+    index_params = client.prepare_index_params()
+    index_params.add_index("embedding", index_type="AUTOINDEX", metric_type="COSINE")
+
+    client.create_collection(collection_name=collection_name, schema=schema, index_params=index_params)
+
+# Synthetic Path B rows, statuses spread evenly
+def generate_status_rows(num_rows: int, embedding_dim: int, seed: int = 2) -> List[Dict]:
+    vectors = generate_vectors(num_rows, embedding_dim, seed)
+
+    return [{
+        'id': f"id_status_{i}",
+        'text': f"generated statement {i}",
+        'embedding': vectors[i].tolist(),
+        'chunk_id': f"status_{i}",
+        'total_chunks': 1,
+        'chunk_index': 0,
+        'status': STATUSES[i % len(STATUSES)],
+        'filename': "benchmark.csv",
+        'char_count': 0,
+        'timestamp': 0
+    } for i in range(num_rows)]
+
+# Swap the vector index of a collection (release, drop, create, load); the metric is kept
+def rebuild_index(client: MilvusClient, collection_name: str, index_type: str, params: Dict):
+    metric_type = index_metric_type(client, collection_name)
+
+    # Seal growing segments so searches actually go through the index
+    client.flush(collection_name)
+    client.release_collection(collection_name)
+    for index_name in client.list_indexes(collection_name, field_name="embedding"):
+        client.drop_index(collection_name, index_name)
+
+    index_params = client.prepare_index_params()
+    index_params.add_index("embedding", index_type=index_type, metric_type=metric_type, params=params)
+    client.create_index(collection_name, index_params)
+    client.load_collection(collection_name)
+
+# Time retriever searches (one query per call, as the graph nodes issue them) and score recall
+def measure(retriever,
+            format_hits,
+            vectors: np.ndarray,
+            ids: List[str],
+            queries: np.ndarray,
+            top_k: int,
+            filter_field: Optional[str] = None,
+            filter_values: Optional[List[str]] = None,
+            row_values: Optional[List[str]] = None) -> Dict:
+    latencies = []
+    recalls = []
+
+    for i, query in enumerate(queries):
+        filters = None
+        mask = None
+        if filter_field:
+            value = filter_values[i % len(filter_values)]
+            filters = {filter_field: [value]}
+            mask = np.asarray([stored == value for stored in row_values])
+
+        start = time.perf_counter()
+        hits = retriever._search([query.tolist()], top_k, filters)
+        results = format_hits(hits[0], top_k)
+        latencies.append(time.perf_counter() - start)
+
+        truth = brute_force_top_k(vectors, ids, query, top_k, mask)
+        if truth:
+            found = {result['id'] for result in results}
+            recalls.append(len(found.intersection(truth)) / len(truth))
+
+    summary = summarize_latencies(latencies)
+    summary['recall_at_k'] = float(np.mean(recalls)) if recalls else 0.0
+    return summary
+
+# Run every index config x search_params level x (unfiltered, filtered) for one path
+def benchmark_path(client: MilvusClient,
+                   path: str,
+                   retriever,
+                   format_hits,
+                   collection_name: str,
+                   vectors: np.ndarray,
+                   ids: List[str],
+                   queries: np.ndarray,
+                   top_k: int,
+                   filter_field: str,
+                   filter_values: List[str],
+                   row_values: List[str],
+                   index_configs: List[Dict]) -> List[Dict]:
+    results = []
+
+    for config in index_configs:
+        print(f"[{path}] building {config['index_type']} index")
+        rebuild_index(client, collection_name, config['index_type'], config['params'])
+
+        for search_params in config['search_params']:
+            retriever.search_params = {"metric_type": retriever.metric_type, "params": search_params}
+
+            # Warm-up so the first timed search doesn't pay for segment loading
+            measure(retriever, format_hits, vectors, ids, queries[:5], top_k)
+
+            unfiltered = measure(retriever, format_hits, vectors, ids, queries, top_k)
+            filtered = measure(retriever, format_hits, vectors, ids, queries, top_k,
+                               filter_field, filter_values, row_values)
+
+            results.append({
+                'path': path,
+                'index_type': config['index_type'],
+                'index_params': config['params'],
+                'search_params': search_params,
+                'unfiltered': unfiltered,
+                'filtered': filtered,
+                'filter_overhead_p50': filtered['p50_ms'] / unfiltered['p50_ms'] if unfiltered['p50_ms'] else None
+            })
+            print(f"[{path}] {config['index_type']} {search_params}: "
+                  f"p50 {unfiltered['p50_ms']:.2f} ms / filtered {filtered['p50_ms']:.2f} ms, "
+                  f"recall@{top_k} {unfiltered['recall_at_k']:.3f} / {filtered['recall_at_k']:.3f}")
+
+    return results
+
+# Bring up both schemas in Milvus Lite, load data and benchmark the real retriever classes
+def run_retrieval_benchmark(uri: str = "./retrieval_benchmark.db",
+                            num_rows: int = 10000,
+                            num_queries: int = 100,
+                            top_k: int = 10,
+                            paths: List[str] = ("a", "b"),
+                            index_types: Optional[List[str]] = None,
+                            fixture_path: Optional[str] = None,
+                            embedding_model: str = "all-MiniLM-L6-v2") -> Dict:
+    client = MilvusClient(uri)
+    embedding_dim = get_embedding_provider(embedding_model, use_cuda=False).embedding_dim
+    index_configs = [config for config in INDEX_CONFIGS
+                     if not index_types or config['index_type'] in index_types]
+
+    report = {
+        'benchmark': 'retrieval',
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'pymilvus_version': pymilvus.__version__,
+        'config': {
+            'uri': uri,
+            'num_rows': num_rows,
+            'num_queries': num_queries,
+            'top_k': top_k,
+            'embedding_dim': embedding_dim,
+            'fixture': fixture_path
+        },
+        'results': []
+    }
+
+    if "a" in paths:
+        if client.has_collection(PATH_A_COLLECTION):
+            client.drop_collection(PATH_A_COLLECTION)
+
+        chunks = load_fixture_chunks(fixture_path) if fixture_path else generate_chunks(num_rows, embedding_dim)
+        zilliz_uploader(None, None, PATH_A_COLLECTION, embedding_dim, client=client).upload_chunks(chunks, batch_size=1000)
+
+        retriever = zilliz_retriever(None, None, PATH_A_COLLECTION, embedding_model, use_cuda=False, client=client)
+        vectors = np.asarray([chunk['embedding'] for chunk in chunks], dtype=np.float32)
+        ids = [f"id_{chunk['metadata'].get('chunk_id', 'unknown')}" for chunk in chunks]
+        categories = [chunk['metadata'].get('category', [None])[0] for chunk in chunks]
+
+        report['results'].extend(benchmark_path(
+            client, "a", retriever,
+            lambda hits, k: retriever._format_hits(hits, k, None, ["id"]),
+            PATH_A_COLLECTION, vectors, ids, generate_queries(vectors, num_queries), top_k,
+            "category", sorted(set(c for c in categories if c)) or CATEGORIES, categories, index_configs
+        ))
+        client.drop_collection(PATH_A_COLLECTION)
+
+    if "b" in paths:
+        if client.has_collection(PATH_B_COLLECTION):
+            client.drop_collection(PATH_B_COLLECTION)
+
+        create_path_b_collection(client, PATH_B_COLLECTION, embedding_dim)
+        rows = generate_status_rows(num_rows, embedding_dim)
+        for i in range(0, len(rows), 1000):
+            client.insert(PATH_B_COLLECTION, rows[i:i + 1000])
+
+        retriever_b = zilliz_retriever_b(None, None, PATH_B_COLLECTION, embedding_model, use_cuda=False, client=client)
+        vectors = np.asarray([row['embedding'] for row in rows], dtype=np.float32)
+        ids = [row['id'] for row in rows]
+        statuses = [row['status'] for row in rows]
+
+        report['results'].extend(benchmark_path(
+            client, "b", retriever_b,
+            lambda hits, k: retriever_b._format_hits(hits, k, None),
+            PATH_B_COLLECTION, vectors, ids, generate_queries(vectors, num_queries), top_k,
+            "status", STATUSES, statuses, index_configs
+        ))
+        client.drop_collection(PATH_B_COLLECTION)
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval latency / recall benchmark on Milvus Lite")
+    parser.add_argument("--uri", default=os.getenv("BENCHMARK_MILVUS_URI", "./retrieval_benchmark.db"))
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--paths", default="a,b", help="Comma-separated: a, b")
+    parser.add_argument("--index-types", help="Comma-separated subset of FLAT, IVF_FLAT, HNSW, AUTOINDEX")
+    parser.add_argument("--fixture", help="JSON list of embedded chunks for Path A instead of synthetic data")
+    parser.add_argument("--output", default="retrieval_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    result = run_retrieval_benchmark(
+        uri=args.uri,
+        num_rows=args.rows,
+        num_queries=args.queries,
+        top_k=args.top_k,
+        paths=args.paths.split(","),
+        index_types=args.index_types.split(",") if args.index_types else None,
+        fixture_path=args.fixture
+    )
+
+    # Stable key order so reports diff cleanly between releases
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(f"Report written to {args.output}")
\ No newline at end of file
@@ -0,0 +1,219 @@
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymilvus import MilvusClient
+
+# One MilvusClient per (uri, token), shared by every retriever and uploader of that endpoint.
+# A MilvusClient wraps a gRPC channel that is safe to use from several threads at once.
+class client_pool:
+
+    def __init__(self):
+        # (uri, token digest) -> pooled client and its counters
+        self._clients: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def _key(uri: str, token: Optional[str]) -> Tuple[str, str]:
+        # The token itself is never kept as a key or shown in stats
+        return uri, hashlib.sha1((token or "").encode()).hexdigest()[:12]
+
+    # Shared client for an endpoint, connecting on first use
+    def acquire(self, uri: str, token: Optional[str] = None) -> MilvusClient:
+        if not uri:
+            raise ValueError("Milvus URI must be provided")
+
+        key = self._key(uri, token)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry['acquired'] += 1
+                self.reused += 1
+                return entry['client']
+
+            start = time.perf_counter()
+            client = MilvusClient(uri=uri, token=token) if token else MilvusClient(uri=uri)
+            self._clients[key] = {
+                'client': client,
+                'uri': uri,
+                'acquired': 1,
+                'connect_seconds': time.perf_counter() - start,
+                'connected_at': time.time()
+            }
+            self.created += 1
+            return client
+
+    # Ping every pooled endpoint (list_collections) and report its latency
+    def health_check(self, timeout: float = 5.0) -> List[Dict]:
+        with self._lock:
+            entries = list(self._clients.values())
+
+        report = []
+        for entry in entries:
+            start = time.perf_counter()
+            try:
+                entry['client'].list_collections(timeout=timeout)
+                status = {'healthy': True}
+            except Exception as e:
+                status = {'healthy': False, 'error': str(e)}
+            report.append(dict(status, uri=entry['uri'], latency_ms=(time.perf_counter() - start) * 1000))
+        return report
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'created': self.created,
+                'reused': self.reused,
+                'endpoints': [{
+                    'uri': entry['uri'],
+                    'acquired': entry['acquired'],
+                    'connect_seconds': entry['connect_seconds'],
+                    'connected_at': entry['connected_at']
+                } for entry in self._clients.values()]
+            }
+
+    # Close and forget every pooled client
+    def close_all(self):
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+
+        for entry in entries:
+            try:
+                entry['client'].close()
+            except Exception as e:
+                print(f"Error closing client for {entry['uri']}: {e}")
+
+# Retriever instances keyed by (uri, collection). Settings are registered up front and
+# the retriever is built on first use; each key has its own build lock, so two
+# retrievers still warm up in parallel while concurrent callers of one key wait for a single build.
+class retriever_registry:
+
+    def __init__(self):
+        self._settings: Dict[Tuple[str, str], Tuple[Callable, Dict]] = {}
+        self._instances: Dict[Tuple[str, str], Any] = {}
+        self._build_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._build_seconds: Dict[Tuple[str, str], float] = {}
+        self._errors: Dict[Tuple[str, str], str] = {}
+        self._aliases: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    # Local-only retrievers have no URI - their snapshot path stands in for it
+    @staticmethod
+    def make_key(uri: Optional[str], collection_name: str, local_index_path: Optional[str] = None) -> Tuple[str, str]:
+        return uri or local_index_path or "local", collection_name
+
+    # Register settings for a retriever; re-registering a key drops its built instance
+    def register(self,
+                 factory: Callable,
+                 settings: Dict,
+                 alias: Optional[str] = None) -> Tuple[str, str]:
+        key = self.make_key(settings.get('zilliz_uri'), settings['collection_name'], settings.get('local_index_path'))
+
+        with self._lock:
+            self._settings[key] = (factory, dict(settings))
+            self._instances.pop(key, None)
+            self._errors.pop(key, None)
+            self._build_locks.setdefault(key, threading.Lock())
+            if alias:
+                self._aliases[alias] = key
+        return key
+
+    def _resolve(self, key_or_alias) -> Tuple[str, str]:
+        if isinstance(key_or_alias, tuple):
+            return key_or_alias
+        with self._lock:
+            if key_or_alias not in self._aliases:
+                raise RuntimeError(f"Retriever '{key_or_alias}' not configured. Call its configure function first")
+            return self._aliases[key_or_alias]
+
+    # Built retriever or None - never triggers a build (safe to call on the event loop)
+    def peek(self, key_or_alias):
+        try:
+            key = self._resolve(key_or_alias)
+        except RuntimeError:
+            return None
+        return self._instances.get(key)
+
+    # Retriever for a key or alias, built on the first call
+    def get(self, key_or_alias):
+        key = self._resolve(key_or_alias)
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if key not in self._settings:
+                raise RuntimeError(f"Retriever {key} not configured")
+            build_lock = self._build_locks[key]
+
+        with build_lock:
+            instance = self._instances.get(key)
+            if instance is not None:
+                return instance
+
+            factory, settings = self._settings[key]
+            start = time.perf_counter()
+            try:
+                instance = factory(**settings)
+            except Exception as e:
+                self._errors[key] = str(e)
+                raise
+
+            with self._lock:
+                # A register() during the build replaced the settings - don't keep the stale instance
+                if self._settings.get(key, (None, None))[1] is settings:
+                    self._instances[key] = instance
+                    self._build_seconds[key] = time.perf_counter() - start
+                    self._errors.pop(key, None)
+            return instance
+
+    # Collection reachable through each built retriever's (pooled) client
+    def health_check(self) -> Dict[str, Dict]:
+        with self._lock:
+            keys = list(self._settings)
+            instances = dict(self._instances)
+
+        report = {}
+        for key in keys:
+            name = "/".join(key)
+            instance = instances.get(key)
+            if instance is None:
+                report[name] = {'built': False, 'healthy': key not in self._errors, 'error': self._errors.get(key)}
+                continue
+            if instance.client is None:
+                report[name] = {'built': True, 'healthy': instance.local_index is not None, 'backend': 'local_index'}
+                continue
+
+            start = time.perf_counter()
+            try:
+                healthy = instance.client.has_collection(instance.collection_name)
+                report[name] = {'built': True, 'healthy': healthy}
+            except Exception as e:
+                report[name] = {'built': True, 'healthy': False, 'error': str(e)}
+            report[name]['latency_ms'] = (time.perf_counter() - start) * 1000
+        return report
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'registered': len(self._settings),
+                'built': len(self._instances),
+                'aliases': {alias: "/".join(key) for alias, key in self._aliases.items()},
+                'build_seconds': {"/".join(key): seconds for key, seconds in self._build_seconds.items()},
+                'errors': {"/".join(key): error for key, error in self._errors.items()},
+                'pool': _client_pool.stats()
+            }
+
+# Process-wide pool and registry shared by both retrievers and the uploader
+_client_pool = client_pool()
+_retriever_registry = retriever_registry()
+
+def get_client_pool() -> client_pool:
+    return _client_pool
+
+def get_retriever_registry() -> retriever_registry:
+    return _retriever_registry
\ No newline at end of file
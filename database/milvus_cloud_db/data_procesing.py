@@ -1,66 +1,152 @@
+import os
 import pandas as pd
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
 from PyPDF2 import PdfReader
 
 
+# Process-pool workers (module level so they can be pickled)
+def _count_pdf_pages(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+
+# Cleaned text of pages [start, end) of a PDF in page order, empty pages skipped
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    reader = PdfReader(file_path)
+    pages = []
+    for page_index in range(start, end):
+        text = " ".join((reader.pages[page_index].extract_text() or "").split())
+        if text:
+            pages.append(text)
+    return pages
+
+
+# Row separator for whole-column cleaning (not whitespace, so split() keeps it)
+_CELL_SEPARATOR = "\x00"
+
+
+# Collapse whitespace in every cell of a column at once - the cells are joined into one
+# string, cleaned with a single split/join and cut apart again, so there is no per-cell
+# Python call. Cells that contain the separator fall back to cleaning one by one
+def _clean_column(column: pd.Series) -> List[str]:
+    # Missing cells read as "nan", as str() of each cell did before
+    values = column.fillna("nan").astype(str).tolist()
+    joined = " ".join(_CELL_SEPARATOR.join(values).split())
+    cells = joined.replace(f" {_CELL_SEPARATOR}", _CELL_SEPARATOR).replace(f"{_CELL_SEPARATOR} ", _CELL_SEPARATOR).split(_CELL_SEPARATOR)
+    if len(cells) != len(values):
+        return [" ".join(value.split()) for value in values]
+    return cells
+
+
+# "question answer" texts of a CSV read chunk (first two columns)
+def _qa_texts(frame: pd.DataFrame) -> List[str]:
+    return [f"{question} {answer}" for question, answer in zip(_clean_column(frame.iloc[:, 0]),
+                                                               _clean_column(frame.iloc[:, 1]))]
+
+
+# Q&A texts of a CSV, one list per csv_chunk_rows rows (only the first two columns are parsed)
+def _iter_csv_texts(file_path: str, csv_chunk_rows: int) -> Iterator[List[str]]:
+    for frame in pd.read_csv(file_path, chunksize=csv_chunk_rows, usecols=[0, 1]):
+        yield _qa_texts(frame)
+
+
+# Q&A texts of a whole CSV file
+def _extract_csv(file_path: str, csv_chunk_rows: int) -> List[str]:
+    return [text for texts in _iter_csv_texts(file_path, csv_chunk_rows) for text in texts]
+
+
 class data_processing:
-    def __init__(self):
-        pass
+    def __init__(self, csv_chunk_rows: int = 10000):
+        # Rows read from a CSV at a time when streaming
+        self.csv_chunk_rows = csv_chunk_rows
+
+        # Per-file outcome of the last iter_documents / process_documents run
+        self.file_stats: List[Dict] = []
 
     # Clean text helper
     def _clean_text(self, text: str) -> str:
         return " ".join(text.split()).strip()
 
-    # Process CSV file
-    def _process_csv(self, file_path: str, title: str, tags: List[str], category: List[str]) -> List[Dict]:
-        df = pd.read_csv(file_path)
-        results = []
-
-        for idx, row in df.iterrows():
-            q = self._clean_text(str(row.iloc[0]))
-            a = self._clean_text(str(row.iloc[1]))
-            text = f"{q} {a}"
-
-            results.append(
-                {
-                    "text": text,
-                    "metadata": {
-                        "title": title,
-                        "tags": tags,
-                        "category": category,
-                        "filename": file_path.split("/")[-1]
-                    }
-                }
-            )
+    def _record(self, text: str, file_path: str, title: str, tags: List[str], category: List[str]) -> Dict:
+        return {
+            "text": text,
+            "metadata": {
+                "title": title,
+                "tags": tags,
+                "category": category,
+                "filename": file_path.split("/")[-1]
+            }
+        }
 
-        print(f"CSV processed: {len(results)} rows")
-        return results
+    # Stream CSV rows in batches - only csv_chunk_rows rows are held in memory at a time
+    def _iter_csv_batches(self, file_path: str, title: str, tags: List[str], category: List[str]) -> Iterator[List[Dict]]:
+        for texts in _iter_csv_texts(file_path, self.csv_chunk_rows):
+            yield [self._record(text, file_path, title, tags, category) for text in texts]
 
-    # Process PDF file
-    def _process_pdf(self, file_path: str, title: str, tags: List[str], category: List[str]) -> List[Dict]:
+    def _iter_csv(self, file_path: str, title: str, tags: List[str], category: List[str]) -> Iterator[Dict]:
+        for records in self._iter_csv_batches(file_path, title, tags, category):
+            yield from records
+
+    # Stream PDF pages - pages are parsed as they are read
+    def _iter_pdf(self, file_path: str, title: str, tags: List[str], category: List[str]) -> Iterator[Dict]:
         reader = PdfReader(file_path)
-        results = []
 
         for page_num, page in enumerate(reader.pages, start=1):
             text = self._clean_text(page.extract_text() or "")
             if not text:
                 continue
 
-            results.append(
-                {
-                    "text": text,
-                    "metadata": {
-                        "title": title,
-                        "tags": tags,
-                        "category": category,
-                        "filename": file_path.split("/")[-1]
-                    }
-                }
-            )
+            yield self._record(text, file_path, title, tags, category)
+
+    # Process CSV file
+    def _process_csv(self, file_path: str, title: str, tags: List[str], category: List[str]) -> List[Dict]:
+        results = list(self._iter_csv(file_path, title, tags, category))
+
+        print(f"CSV processed: {len(results)} rows")
+        return results
+
+    # Process PDF file
+    def _process_pdf(self, file_path: str, title: str, tags: List[str], category: List[str]) -> List[Dict]:
+        results = list(self._iter_pdf(file_path, title, tags, category))
 
         print(f"PDF processed: {len(results)} pages")
         return results
 
+    # Stream records of a document (CSV rows or PDF pages) for the ingestion pipeline
+    def iter_document(
+        self,
+        file_path: str,
+        category: List[str],
+        tags: List[str],
+        title: str,
+    ) -> Iterator[Dict]:
+        if not file_path or not title:
+            raise ValueError("file_path and title are required")
+
+        if file_path.endswith(".csv"):
+            return self._iter_csv(file_path, title, tags, category)
+        if file_path.endswith(".pdf"):
+            return self._iter_pdf(file_path, title, tags, category)
+        raise ValueError("Unsupported file format. Only CSV and PDF are allowed.")
+
+    # Batched variant of iter_document - one list per CSV read chunk or per PDF page
+    def iter_document_batches(
+        self,
+        file_path: str,
+        category: List[str],
+        tags: List[str],
+        title: str,
+    ) -> Iterator[List[Dict]]:
+        if not file_path or not title:
+            raise ValueError("file_path and title are required")
+
+        if file_path.endswith(".csv"):
+            return self._iter_csv_batches(file_path, title, tags, category)
+        if file_path.endswith(".pdf"):
+            return ([record] for record in self._iter_pdf(file_path, title, tags, category))
+        raise ValueError("Unsupported file format. Only CSV and PDF are allowed.")
+
     # Process document (CSV or PDF)
     def process_document(
         self,
@@ -82,4 +168,100 @@ class data_processing:
             raise ValueError("Unsupported file format. Only CSV and PDF are allowed.")
 
         print(f"Done: {len(content)} items")
-        return content
\ No newline at end of file
+        return content
+
+    # Extract many documents on a process pool - PDFs are split into page ranges, CSVs are one
+    # task per file. Records come out in document order and page order; a file whose task fails
+    # is skipped as a whole (reported in file_stats) without stopping the other files.
+    # documents: [{'file_path', 'category', 'tags', 'title'}]
+    def iter_documents(
+        self,
+        documents: List[Dict],
+        max_workers: Optional[int] = None,
+        pages_per_task: int = 8,
+    ) -> Iterator[Dict]:
+        if not documents:
+            raise ValueError("No documents provided")
+
+        max_workers = max_workers or os.cpu_count() or 1
+        self.file_stats = [{'file': (doc.get('file_path') or "").split("/")[-1], 'status': 'success', 'items': 0, 'error': None}
+                           for doc in documents]
+
+        def fail(doc_index: int, error: Exception):
+            self.file_stats[doc_index].update(status='failed', items=0, error=str(error))
+            print(f"Extraction failed for {self.file_stats[doc_index]['file']}: {error}")
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            # Page counts in parallel, then one task per page range / CSV file, in document order
+            page_counts = {i: pool.submit(_count_pdf_pages, doc['file_path'])
+                           for i, doc in enumerate(documents)
+                           if doc.get('title') and (doc.get('file_path') or "").endswith(".pdf")}
+
+            tasks = []
+            for i, doc in enumerate(documents):
+                file_path = doc.get('file_path') or ""
+                if not file_path or not doc.get('title'):
+                    fail(i, ValueError("file_path and title are required"))
+                elif file_path.endswith(".csv"):
+                    tasks.append((i, _extract_csv, (file_path, self.csv_chunk_rows)))
+                elif i in page_counts:
+                    try:
+                        page_count = page_counts[i].result()
+                    except Exception as e:
+                        fail(i, e)
+                        continue
+                    tasks.extend((i, _extract_pdf_pages, (file_path, start, min(start + pages_per_task, page_count)))
+                                 for start in range(0, page_count, pages_per_task))
+                else:
+                    fail(i, ValueError("Unsupported file format. Only CSV and PDF are allowed."))
+
+            # Bounded window of in-flight tasks; a file's records are held until all of its
+            # tasks finished, so a failure never emits part of a file
+            pending = deque()
+            task_iter = iter(tasks)
+
+            def fill():
+                for doc_index, fn, args in task_iter:
+                    pending.append((doc_index, pool.submit(fn, *args)))
+                    if len(pending) >= max_workers * 2:
+                        return
+
+            fill()
+            current, texts, failed = None, [], False
+            while pending:
+                doc_index, future = pending.popleft()
+                fill()
+
+                if doc_index != current:
+                    if current is not None and not failed:
+                        yield from self._file_records(documents[current], texts, current)
+                    current, texts, failed = doc_index, [], False
+
+                if failed:
+                    continue
+                try:
+                    texts.extend(future.result())
+                except Exception as e:
+                    fail(doc_index, e)
+                    failed = True
+
+            if current is not None and not failed:
+                yield from self._file_records(documents[current], texts, current)
+
+    def _file_records(self, doc: Dict, texts: List[str], doc_index: int) -> Iterator[Dict]:
+        self.file_stats[doc_index]['items'] = len(texts)
+        for text in texts:
+            yield self._record(text, doc['file_path'], doc['title'], doc.get('tags', []), doc.get('category', []))
+
+    # List variant of iter_documents with a per-file summary
+    def process_documents(
+        self,
+        documents: List[Dict],
+        max_workers: Optional[int] = None,
+        pages_per_task: int = 8,
+    ) -> List[Dict]:
+        results = list(self.iter_documents(documents, max_workers, pages_per_task))
+
+        failed = [stat for stat in self.file_stats if stat['status'] == 'failed']
+        print(f"Processed {len(documents)} files: {len(results)} items, {len(failed)} failed")
+        return results
\ No newline at end of file
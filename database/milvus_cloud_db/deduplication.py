@@ -0,0 +1,261 @@
+import re
+import json
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+DEDUP_METHODS = ("minhash", "embedding")
+
+# Mersenne prime 2^31 - 1: a * x + b stays inside uint64 for 31-bit hashes
+_MERSENNE_PRIME = (1 << 31) - 1
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Near-duplicate chunk filter - runs between chunking (or embedding) and zilliz_uploader.upload_chunks
+class deduplication:
+
+    def __init__(self,
+                 method: str = "minhash",
+                 threshold: float = 0.85,
+                 num_perm: int = 128,
+                 bands: int = 32,
+                 shingle_size: int = 3,
+                 scope_fields: Tuple[str, ...] = ("category",),
+                 block_size: int = 1024,
+                 seed: int = 1):
+        if method not in DEDUP_METHODS:
+            raise ValueError(f"Unknown dedup method '{method}', expected one of {DEDUP_METHODS}")
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.method = method
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.block_size = block_size
+
+        # Chunks are only compared within the same scope - a duplicate in another
+        # category is kept so category-filtered searches still find it
+        self.scope_fields = scope_fields
+
+        rng = np.random.default_rng(seed)
+        self._perm_a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._perm_b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+        # One entry per dropped chunk from the last run
+        self.dropped: List[Dict] = []
+        self.input_count = 0
+
+    # Word shingles of a chunk, hashed to 31-bit ints
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) < self.shingle_size:
+            tokens = [" ".join(tokens)] if tokens else [""]
+            size = 1
+        else:
+            size = self.shingle_size
+
+        shingles = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        return np.fromiter(
+            (zlib.crc32(shingle.encode()) & _MERSENNE_PRIME for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+
+    # MinHash signature (num_perm values) of a chunk
+    def _signature(self, text: str) -> np.ndarray:
+        hashes = self._shingle_hashes(text)
+        permuted = (hashes[:, None] * self._perm_a[None, :] + self._perm_b[None, :]) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _scope(self, chunk: Dict) -> str:
+        metadata = chunk.get('metadata', {})
+        return json.dumps([metadata.get(field) for field in self.scope_fields], sort_keys=True, default=str)
+
+    # Keep the first chunk of each near-duplicate group; returns (kept indexes, [(dropped, kept_as, similarity)])
+    def _minhash_groups(self, chunks: List[Dict]) -> Tuple[List[int], List[Tuple[int, int, float]]]:
+        lsh = _minhash_lsh(self)
+        kept = []
+        duplicates = []
+
+        for i, chunk in enumerate(chunks):
+            match = lsh.match_or_add(i, chunk)
+            if match is not None:
+                duplicates.append((i, match[0], match[1]))
+            else:
+                kept.append(i)
+
+        return kept, duplicates
+
+    # Same contract using cosine similarity of the chunk embeddings (blockwise matrix products)
+    def _embedding_groups(self, chunks: List[Dict]) -> Tuple[List[int], List[Tuple[int, int, float]]]:
+        kept = []
+        duplicates = []
+
+        by_scope: Dict[str, List[int]] = defaultdict(list)
+        for i, chunk in enumerate(chunks):
+            if 'embedding' not in chunk:
+                raise ValueError("Embedding dedup needs embedded chunks (run embedding.process_chunks first)")
+            by_scope[self._scope(chunk)].append(i)
+
+        for indexes in by_scope.values():
+            vectors = np.asarray([chunks[i]['embedding'] for i in indexes], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors /= norms
+
+            kept_vectors = np.empty_like(vectors)
+            kept_ids = []
+
+            for start in range(0, len(indexes), self.block_size):
+                block = vectors[start:start + self.block_size]
+                previous = block @ kept_vectors[:len(kept_ids)].T if kept_ids else None
+
+                block_kept = []
+                for offset, vector in enumerate(block):
+                    best, best_similarity = None, -1.0
+                    if previous is not None:
+                        j = int(np.argmax(previous[offset]))
+                        best, best_similarity = kept_ids[j], float(previous[offset][j])
+                    if block_kept:
+                        within = block[block_kept] @ vector
+                        j = int(np.argmax(within))
+                        if within[j] > best_similarity:
+                            best, best_similarity = indexes[start + block_kept[j]], float(within[j])
+
+                    if best is not None and best_similarity >= self.threshold:
+                        duplicates.append((indexes[start + offset], best, best_similarity))
+                    else:
+                        block_kept.append(offset)
+
+                for offset in block_kept:
+                    kept_vectors[len(kept_ids)] = block[offset]
+                    kept_ids.append(indexes[start + offset])
+
+            kept.extend(kept_ids)
+
+        return sorted(kept), duplicates
+
+    # Drop near-duplicate chunks; order of the kept chunks is preserved
+    def deduplicate(self, chunks: List[Dict]) -> List[Dict]:
+        if not chunks:
+            raise ValueError("No chunks provided")
+
+        if self.method == "minhash":
+            kept, duplicates = self._minhash_groups(chunks)
+        else:
+            kept, duplicates = self._embedding_groups(chunks)
+
+        self.input_count = len(chunks)
+        self.dropped = [{
+            'chunk_id': chunks[i].get('metadata', {}).get('chunk_id'),
+            'duplicate_of': chunks[j].get('metadata', {}).get('chunk_id'),
+            'similarity': round(similarity, 4),
+            'filename': chunks[i].get('metadata', {}).get('filename'),
+            'text': chunks[i]['text'][:200]
+        } for i, j, similarity in duplicates]
+
+        print(f"Deduplication ({self.method}, threshold {self.threshold}): "
+              f"kept {len(kept)} of {len(chunks)} chunks, dropped {len(duplicates)}")
+        return [chunks[i] for i in kept]
+
+    # Streaming variant (minhash) for the ingestion pipeline - chunks are checked one at a
+    # time against every chunk kept earlier in the stream, whatever batch it came in.
+    # The LSH state grows with the kept chunks (one signature and one bucket entry per band each)
+    def iter_deduplicate(self, chunks: Iterable[Dict]) -> Iterator[Dict]:
+        if self.method != "minhash":
+            raise ValueError("Streaming deduplication needs the minhash method (embedding dedup runs on the list API)")
+
+        lsh = _minhash_lsh(self)
+        self.input_count = 0
+        self.dropped = []
+
+        for chunk in chunks:
+            self.input_count += 1
+            metadata = chunk.get('metadata', {})
+            key = metadata.get('chunk_id') or f"chunk_{self.input_count}"
+
+            match = lsh.match_or_add(key, chunk)
+            if match is None:
+                yield chunk
+                continue
+
+            self.dropped.append({
+                'chunk_id': key,
+                'duplicate_of': match[0],
+                'similarity': round(match[1], 4),
+                'filename': metadata.get('filename'),
+                'text': chunk['text'][:200]
+            })
+
+        print(f"Deduplication ({self.method}, threshold {self.threshold}): "
+              f"kept {self.input_count - len(self.dropped)} of {self.input_count} chunks, dropped {len(self.dropped)}")
+
+    # Summary of the last run - counts per source file plus every dropped chunk
+    def report(self) -> Dict:
+        by_file: Dict[str, int] = defaultdict(int)
+        for entry in self.dropped:
+            by_file[entry['filename'] or 'unknown'] += 1
+
+        return {
+            'method': self.method,
+            'threshold': self.threshold,
+            'input_count': self.input_count,
+            'kept_count': self.input_count - len(self.dropped),
+            'dropped_count': len(self.dropped),
+            'dropped_ratio': len(self.dropped) / self.input_count if self.input_count else 0.0,
+            'dropped_by_file': dict(by_file),
+            'dropped': self.dropped
+        }
+
+    def save_report(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Dedup report written to {path}")
+
+    def show_report(self, max_rows: int = 5):
+        report = self.report()
+        print(f"Input: {report['input_count']}, kept: {report['kept_count']}, "
+              f"dropped: {report['dropped_count']} ({report['dropped_ratio']:.1%})")
+
+        for filename, count in sorted(report['dropped_by_file'].items(), key=lambda item: -item[1]):
+            print(f"  {filename}: {count} dropped")
+
+        for entry in self.dropped[:max_rows]:
+            print(f"  {entry['chunk_id']} ~ {entry['duplicate_of']} ({entry['similarity']:.3f}): {entry['text'][:80]}...")
+
+# MinHash LSH buckets and signatures of the kept chunks - shared by the list and streaming paths
+class _minhash_lsh:
+
+    def __init__(self, dedup: deduplication):
+        self.dedup = dedup
+        self.rows_per_band = dedup.num_perm // dedup.bands
+        self.buckets: Dict[Tuple, List[Any]] = defaultdict(list)
+        # Values are < 2^31, so uint32 halves the memory of the kept signatures
+        self.signatures: Dict[Any, np.ndarray] = {}
+
+    # Best kept match (key, similarity) at or above the threshold; otherwise the chunk is kept under key
+    def match_or_add(self, key: Any, chunk: Dict) -> Optional[Tuple[Any, float]]:
+        signature = self.dedup._signature(chunk['text']).astype(np.uint32)
+        scope = self.dedup._scope(chunk)
+        rows = self.rows_per_band
+        band_keys = [(scope, band, signature[band * rows:(band + 1) * rows].tobytes())
+                     for band in range(self.dedup.bands)]
+
+        # LSH candidates - kept chunks sharing at least one band
+        candidates = {j for band_key in band_keys for j in self.buckets.get(band_key, [])}
+        best, best_similarity = None, 0.0
+        for j in candidates:
+            similarity = float(np.mean(self.signatures[j] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = j, similarity
+
+        if best is not None and best_similarity >= self.dedup.threshold:
+            return best, best_similarity
+
+        self.signatures[key] = signature
+        for band_key in band_keys:
+            self.buckets[band_key].append(key)
+        return None
\ No newline at end of file
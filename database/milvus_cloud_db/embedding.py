@@ -1,11 +1,11 @@
-from typing import Dict, List
-from sentence_transformers import SentenceTransformer
+from typing import Dict, Iterable, Iterator, List
 import numpy as np
 import torch
+from database.milvus_cloud_db.embedding_provider import get_embedding_provider, encode_normalized
 
 class embedding:
     
-    def __init__(self, embedding_model: str = "all-MiniLM-L6-v2", use_cuda: bool = True):
+    def __init__(self, embedding_model: str = "all-MiniLM-L6-v2", use_cuda: bool = True, backend: str = "torch"):
         # Device setup
         if use_cuda and torch.cuda.is_available():
             self.device = 'cuda'
@@ -15,32 +15,25 @@ class embedding:
             print("Using CPU for embeddings")
         
         # Load model
-        print(f"Loading model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model, device=self.device)
+        print(f"Loading model: {embedding_model} (backend: {backend})")
+        self.embedding_model = get_embedding_provider(embedding_model, use_cuda, backend).model
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         self.model_name = embedding_model
+        self.backend = backend
         
         print(f"Model loaded. Dimension: {self.embedding_dim}")
     
+    # One contiguous float32 matrix of unit-length rows (the encoder batches internally)
     def generate_embeddings(self, text_list: List[str], batch_size: int = 32) -> np.ndarray:
         if not text_list:
             return np.array([])
         
         print(f"Generating embeddings for {len(text_list)} texts")
         
-        all_embeddings = []
-        for i in range(0, len(text_list), batch_size):
-            batch_texts = text_list[i:i + batch_size]
-            batch_embeddings = self.embedding_model.encode(
-                batch_texts,
-                show_progress_bar=False,
-                convert_to_numpy=True
-            )
-            all_embeddings.append(batch_embeddings)
-        
-        return np.vstack(all_embeddings) if all_embeddings else np.array([])
+        return encode_normalized(self.embedding_model, text_list, batch_size)
     
-    def process_chunks(self, processed_chunks: List[Dict]) -> List[Dict]:
+    # deduplicator: optional embedding-method deduplication run on the embedded chunks
+    def process_chunks(self, processed_chunks: List[Dict], deduplicator=None) -> List[Dict]:
         if not processed_chunks:
             raise ValueError("No processed_chunks provided")
         
@@ -50,15 +43,32 @@ class embedding:
         texts_for_embedding = [chunk['text'] for chunk in processed_chunks]
         embeddings = self.generate_embeddings(texts_for_embedding)
         
-        # Add embeddings to chunks
-        embedded_chunks = []
-        for i, chunk in enumerate(processed_chunks):
-            embedded_chunk = chunk.copy()
-            embedded_chunk['embedding'] = embeddings[i].tolist()
-            embedded_chunks.append(embedded_chunk)
+        # Attach row views of the matrix in place - no per-chunk dict copies or Python float lists
+        for chunk, vector in zip(processed_chunks, embeddings):
+            chunk['embedding'] = vector
+        
+        print(f"Generated {len(processed_chunks)} embeddings")
+        if deduplicator is not None:
+            return deduplicator.deduplicate(processed_chunks)
+        return processed_chunks
+    
+    # Streaming variant - embeds batch_size chunks at a time and yields each embedded batch
+    def iter_embedded_batches(self, chunks: Iterable[Dict], batch_size: int = 256) -> Iterator[List[Dict]]:
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                yield self._embed_batch(batch)
+                batch = []
         
-        print(f"Generated {len(embedded_chunks)} embeddings")
-        return embedded_chunks
+        if batch:
+            yield self._embed_batch(batch)
+    
+    def _embed_batch(self, batch: List[Dict]) -> List[Dict]:
+        embeddings = encode_normalized(self.embedding_model, [chunk['text'] for chunk in batch])
+        for chunk, vector in zip(batch, embeddings):
+            chunk['embedding'] = vector
+        return batch
     
     def show_embedding_info(self, embedded_chunks: List[Dict]):
         if not embedded_chunks:
@@ -70,6 +80,7 @@ class embedding:
         print(f"Model: {self.model_name}")
         print(f"Embedding dimension: {self.embedding_dim}")
         print(f"Device: {self.device}")
+        print(f"Backend: {self.backend}")
         
         # Content stats
         avg_content_len = np.mean([len(chunk['text']) for chunk in embedded_chunks])
@@ -0,0 +1,111 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+# Bounded LRU cache for query embeddings (read-only float32 arrays, shared between callers)
+class embedding_cache:
+
+    def __init__(self, max_size: int = 1024, persist_path: Optional[str] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.persist_path:
+            self.load()
+
+    # Normalize whitespace so trivial variations share one entry
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split())
+
+    def _key(self, model_name: str, query: str) -> Tuple[str, str]:
+        return (model_name, self.normalize(query))
+
+    # Return cached embedding or None (counts hit/miss unless record_stats is False)
+    def get(self, model_name: str, query: str, record_stats: bool = True) -> Optional[np.ndarray]:
+        key = self._key(model_name, query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                if record_stats:
+                    self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if record_stats:
+                self.hits += 1
+            return embedding
+
+    # Store embedding, evicting the least recently used entries
+    def put(self, model_name: str, query: str, embedding: np.ndarray):
+        key = self._key(model_name, query)
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    # Load entries from the backing file (oldest first)
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with open(self.persist_path, "r") as f:
+                rows = json.load(f)
+        except Exception as e:
+            print(f"Embedding cache load failed: {e}")
+            return
+
+        with self._lock:
+            for row in rows[-self.max_size:]:
+                embedding = np.asarray(row['embedding'], dtype=np.float32)
+                embedding.setflags(write=False)
+                self._entries[(row['model'], row['query'])] = embedding
+
+        print(f"Embedding cache loaded: {len(self._entries)} entries")
+
+    # Write entries to the backing file
+    def save(self):
+        if not self.persist_path:
+            return
+
+        with self._lock:
+            rows = [
+                {'model': model, 'query': query, 'embedding': embedding.tolist()}
+                for (model, query), embedding in self._entries.items()
+            ]
+
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, self.persist_path)
\ No newline at end of file
@@ -0,0 +1,202 @@
+import os
+import atexit
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from sentence_transformers import SentenceTransformer
+import numpy as np
+import torch
+from database.milvus_cloud_db.embedding_cache import embedding_cache
+
+# Supported inference backends (onnx variants run on CPU via onnxruntime)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Quantized weights shipped in the model repo (override for ARM / AVX-512 hosts)
+ONNX_INT8_FILE = os.getenv("ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+# Shared providers, one per (model, device, backend)
+_providers: Dict[Tuple[str, str, str], "embedding_provider"] = {}
+_providers_lock = threading.Lock()
+
+# Bounded pool for CPU-bound encoding from async callers
+_encode_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMBEDDING_THREADS", "2")),
+    thread_name_prefix="embedding"
+)
+
+# Process-wide query embedding cache (size and backing file configurable via env)
+_query_cache = embedding_cache(
+    max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")),
+    persist_path=os.getenv("EMBEDDING_CACHE_PATH") or None
+)
+if _query_cache.persist_path:
+    atexit.register(_query_cache.save)
+
+# Encode to a contiguous float32 matrix of unit-length rows (inner product == cosine)
+def encode_normalized(model: SentenceTransformer, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    return model.encode(
+        texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    ).astype(np.float32, copy=False)
+
+# Shared embedding provider - one model copy per worker process
+class embedding_provider:
+
+    def __init__(self,
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 device: str = "cpu",
+                 cache: Optional[embedding_cache] = None,
+                 backend: str = "torch"):
+        self.device = device
+        self.backend = backend
+        self.cache = cache if cache is not None else _query_cache
+
+        # Cache entries from different backends must not mix
+        self.model_name = embedding_model if backend == "torch" else f"{embedding_model}:{backend}"
+
+        print(f"Loading shared embedding model: {embedding_model} ({device}, {backend})")
+        self.model = load_model(embedding_model, device, backend)
+        self.embedding_dim = self.model.get_sentence_embedding_dimension()
+
+        # Misses being encoded, by normalized query - Path A and Path B asking for the same
+        # query share one forward pass, different queries encode in parallel
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+    # Embed a single query (unit-length float32 array), served from the LRU cache when possible
+    def embed_query(self, query: str) -> np.ndarray:
+        embedding = self.cache.get(self.model_name, query)
+        if embedding is not None:
+            return embedding
+
+        return self._encode_miss(query)
+
+    # Encode a cache miss; concurrent callers with the same text share one forward pass
+    def _encode_miss(self, query: str) -> np.ndarray:
+        key = self.cache.normalize(query)
+        with self._in_flight_lock:
+            # Another thread may have encoded it in the meantime
+            embedding = self.cache.get(self.model_name, query, record_stats=False)
+            if embedding is not None:
+                return embedding
+
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._in_flight[key] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return future.result()
+
+        try:
+            vector = encode_normalized(self.model, [query])[0]
+            self.cache.put(self.model_name, query, vector)
+            embedding = self.cache.get(self.model_name, query, record_stats=False)
+            embedding = embedding if embedding is not None else vector
+            future.set_result(embedding)
+            return embedding
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+
+    # Async embed - cache hits return immediately, misses run on the bounded encoder pool
+    async def aembed_query(self, query: str) -> np.ndarray:
+        embedding = self.cache.get(self.model_name, query)
+        if embedding is not None:
+            return embedding
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_encode_executor, self._encode_miss, query)
+
+    # Embed many queries; cache misses are encoded together in one batch
+    def embed_queries(self, queries: List[str], batch_size: int = 32) -> List[np.ndarray]:
+        embeddings: List[Optional[np.ndarray]] = [
+            self.cache.get(self.model_name, query) for query in queries
+        ]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            encoded = encode_normalized(self.model, [queries[i] for i in missing], batch_size)
+            for i, vector in zip(missing, encoded):
+                embeddings[i] = vector
+                self.cache.put(self.model_name, queries[i], vector)
+
+        return embeddings
+
+    def cache_stats(self) -> Dict:
+        return self.cache.stats()
+
+# Load a SentenceTransformer with the requested backend
+def load_model(embedding_model: str, device: str = "cpu", backend: str = "torch") -> SentenceTransformer:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+
+    if backend == "torch":
+        return SentenceTransformer(embedding_model, device=device)
+
+    if backend == "onnx":
+        return SentenceTransformer(embedding_model, device=device, backend="onnx")
+
+    return SentenceTransformer(
+        embedding_model,
+        device=device,
+        backend="onnx",
+        model_kwargs={"file_name": ONNX_INT8_FILE}
+    )
+
+# Compare a backend against torch output - vectors must stay compatible with stored ones
+def parity_check(texts: List[str],
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 backend: str = "onnx-int8") -> Dict:
+    if not texts:
+        raise ValueError("No texts provided for parity check")
+
+    reference = get_embedding_provider(embedding_model, use_cuda=False).model.encode(
+        texts, show_progress_bar=False, normalize_embeddings=True
+    )
+    candidate = get_embedding_provider(embedding_model, use_cuda=False, backend=backend).model.encode(
+        texts, show_progress_bar=False, normalize_embeddings=True
+    )
+
+    cosine = np.sum(reference * candidate, axis=1)
+    drift = 1.0 - cosine
+
+    report = {
+        'backend': backend,
+        'model': embedding_model,
+        'texts': len(texts),
+        'mean_cosine': float(np.mean(cosine)),
+        'min_cosine': float(np.min(cosine)),
+        'mean_drift': float(np.mean(drift)),
+        'max_drift': float(np.max(drift))
+    }
+
+    print(f"Parity {backend} vs torch: mean cosine {report['mean_cosine']:.5f}, "
+          f"max drift {report['max_drift']:.5f}")
+    return report
+
+# Resolve device from the use_cuda flag
+def resolve_device(use_cuda: bool = True) -> str:
+    return 'cuda' if use_cuda and torch.cuda.is_available() else 'cpu'
+
+# Get (or create) the shared provider for a model
+def get_embedding_provider(embedding_model: str = "all-MiniLM-L6-v2",
+                           use_cuda: bool = True,
+                           backend: str = "torch") -> embedding_provider:
+    key = (embedding_model, resolve_device(use_cuda), backend)
+
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = embedding_provider(embedding_model=key[0], device=key[1], backend=backend)
+            _providers[key] = provider
+        return provider
\ No newline at end of file
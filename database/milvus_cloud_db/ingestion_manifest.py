@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+MANIFEST_VERSION = 1
+
+# Local record of the chunks already uploaded, per collection and source file
+DEFAULT_MANIFEST_PATH = os.getenv("INGESTION_MANIFEST_PATH", "ingestion_manifest.json")
+
+# Fingerprint of the stored fields a chunk ID does not cover - a changed title, tag or
+# category re-uploads the chunk even though its text (and ID) is the same
+def chunk_fingerprint(chunk: Dict) -> str:
+    metadata = chunk.get('metadata', {})
+    stored = {
+        'title': metadata.get('title', ''),
+        'tags': metadata.get('tags', []),
+        'category': metadata.get('category', [])
+    }
+    return hashlib.sha1(json.dumps(stored, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+# {collection: {filename: {'chunks': {chunk_id: fingerprint}, 'updated_at': ts}}} in a JSON file
+class ingestion_manifest:
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._collections: Dict[str, Dict[str, Dict]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable manifest {self.path}: {e}")
+            return {}
+        if data.get('version') != MANIFEST_VERSION:
+            print(f"Ignoring manifest {self.path} (version {data.get('version')}, expected {MANIFEST_VERSION})")
+            return {}
+        return data.get('collections', {})
+
+    # Written to a temporary file and renamed, so a crash never leaves half a manifest
+    def save(self):
+        with self._lock:
+            data = {'version': MANIFEST_VERSION, 'collections': self._collections}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    # Uploaded chunk_id -> fingerprint of a file, None if the file was never synced
+    def get(self, collection_name: str, filename: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._collections.get(collection_name, {}).get(filename)
+            return dict(entry['chunks']) if entry else None
+
+    def set(self, collection_name: str, filename: str, chunks: Dict[str, str]):
+        with self._lock:
+            self._collections.setdefault(collection_name, {})[filename] = {
+                'chunks': dict(chunks),
+                'updated_at': int(time.time())
+            }
+
+    def remove(self, collection_name: str, filename: str):
+        with self._lock:
+            self._collections.get(collection_name, {}).pop(filename, None)
+
+    def files(self, collection_name: str) -> List[str]:
+        with self._lock:
+            return sorted(self._collections.get(collection_name, {}))
\ No newline at end of file
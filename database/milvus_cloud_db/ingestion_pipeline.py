@@ -0,0 +1,235 @@
+import time
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+from database.milvus_cloud_db.data_procesing import data_processing
+from database.milvus_cloud_db.text_processing import text_processing
+from database.milvus_cloud_db.embedding import embedding
+from database.milvus_cloud_db.zilliz_uploader import zilliz_uploader
+from database.milvus_cloud_db.ingestion_manifest import ingestion_manifest, chunk_fingerprint
+from database.milvus_cloud_db.deduplication import deduplication
+
+# Pipeline stages in order (each one pulls from the previous); dedup only runs with a deduplicator
+STAGES = ("extract", "chunk", "dedup", "embed", "upload")
+
+# Items counted and time spent inside next() of one stage's iterator
+class _stage_meter:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.seconds = 0.0
+
+    def wrap(self, iterator: Iterable, size: Callable = lambda item: 1) -> Iterator:
+        iterator = iter(iterator)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            self.seconds += time.perf_counter() - start
+            self.items += size(item)
+            yield item
+
+# File -> Zilliz ingestion as a chain of generators (extract -> chunk -> [dedup] -> embed -> upload).
+# Peak memory is one embed batch plus one CSV read chunk, independent of corpus size.
+class ingestion_pipeline:
+
+    def __init__(self,
+                 uploader: zilliz_uploader,
+                 embedder: embedding,
+                 processor: Optional[data_processing] = None,
+                 chunker: Optional[text_processing] = None,
+                 embed_batch_size: int = 256,
+                 progress_every: int = 5000,
+                 manifest: Optional[ingestion_manifest] = None,
+                 deduplicator: Optional[deduplication] = None):
+        self.uploader = uploader
+        self.embedder = embedder
+        self.processor = processor or data_processing()
+        self.chunker = chunker or text_processing()
+        self.embed_batch_size = embed_batch_size
+        self.progress_every = progress_every
+        self.manifest = manifest
+
+        # Optional minhash near-duplicate filter between chunking and embedding
+        if deduplicator is not None and deduplicator.method != "minhash":
+            raise ValueError("The ingestion pipeline streams chunks - use a minhash deduplicator")
+        self.deduplicator = deduplicator
+
+        # Stats of the last run
+        self.stats: Dict = {}
+
+    def _progress(self, batches: Iterator[List[Dict]], meters: Dict[str, _stage_meter], start: float) -> Iterator[List[Dict]]:
+        next_report = self.progress_every
+        for batch in batches:
+            yield batch
+            chunks = meters['embed'].items
+            if chunks >= next_report:
+                elapsed = time.perf_counter() - start
+                print(f"Progress: {meters['extract'].items} records, {chunks} chunks embedded and uploaded "
+                      f"({chunks / elapsed:.0f} chunks/s)")
+                next_report = chunks + self.progress_every
+
+    # Stream one document into the collection; returns per-stage counts, seconds and throughput
+    def run(self, file_path: str, category: List[str], tags: List[str], title: str) -> Dict:
+        print(f"Streaming ingestion: {file_path.split('/')[-1]}")
+        return self._run(self.processor.iter_document_batches(file_path, category, tags, title), file_path, batched=True)
+
+    # Bulk load - extraction fans out over a process pool (files and PDF page ranges),
+    # chunk / embed / upload stream as for a single file.
+    # documents: [{'file_path', 'category', 'tags', 'title'}]
+    def run_many(self, documents: List[Dict], max_workers: Optional[int] = None, pages_per_task: int = 8) -> Dict:
+        print(f"Streaming ingestion: {len(documents)} files")
+        stats = self._run(self.processor.iter_documents(documents, max_workers, pages_per_task),
+                          [doc.get('file_path') for doc in documents])
+        stats['files'] = self.processor.file_stats
+        return stats
+
+    # batched: source yields lists of records (metered per batch, not per record)
+    def _run(self, source: Iterable, files: Union[str, List[str]], batched: bool = False) -> Dict:
+        meters = {name: _stage_meter(name) for name in STAGES}
+        start = time.perf_counter()
+
+        if batched:
+            records = chain.from_iterable(meters['extract'].wrap(source, size=len))
+        else:
+            records = meters['extract'].wrap(source)
+        chunks = meters['chunk'].wrap(self.chunker.iter_chunks(records))
+        stage_names = [name for name in STAGES if name != 'dedup' or self.deduplicator is not None]
+        if self.deduplicator is not None:
+            chunks = meters['dedup'].wrap(self.deduplicator.iter_deduplicate(chunks))
+        batches = meters['embed'].wrap(
+            self.embedder.iter_embedded_batches(chunks, self.embed_batch_size), size=len
+        )
+
+        upload_result = self.uploader.upload_batches(self._progress(batches, meters, start))
+        total = time.perf_counter() - start
+        meters['upload'].items = upload_result['uploaded_count']
+
+        # Meters measure inclusive time (a stage's next() runs every stage before it);
+        # subtracting the upstream stage leaves each stage's own time
+        inclusive = {'extract': meters['extract'].seconds, 'chunk': meters['chunk'].seconds,
+                     'dedup': meters['dedup'].seconds, 'embed': meters['embed'].seconds, 'upload': total}
+        previous = 0.0
+        stages = {}
+        for name in stage_names:
+            seconds = max(inclusive[name] - previous, 0.0)
+            previous = inclusive[name]
+            stages[name] = {
+                'items': meters[name].items,
+                'seconds': seconds,
+                'items_per_second': meters[name].items / seconds if seconds else 0.0
+            }
+
+        self.stats = {
+            'file': files,
+            'status': upload_result['status'],
+            'uploaded_count': upload_result['uploaded_count'],
+            'failed_count': upload_result.get('failed_count', 0),
+            'total_seconds': total,
+            'stages': stages
+        }
+        if 'error' in upload_result:
+            self.stats['error'] = upload_result['error']
+        if self.deduplicator is not None:
+            self.stats['dropped_duplicates'] = len(self.deduplicator.dropped)
+
+        self.show_stats()
+        return self.stats
+
+    def _manifest(self) -> ingestion_manifest:
+        if self.manifest is None:
+            self.manifest = ingestion_manifest()
+        return self.manifest
+
+    # Incremental re-index of one file - only chunks that are new or whose stored metadata
+    # changed are embedded and upserted, chunks no longer in the file are deleted.
+    # replace_untracked: a file missing from the manifest first has its existing rows
+    # (e.g. from a positional-ID upload) deleted, so they are not left behind as duplicates
+    def sync(self, file_path: str, category: List[str], tags: List[str], title: str,
+             replace_untracked: bool = True) -> Dict:
+        if self.chunker.id_mode != "content":
+            raise ValueError("Incremental sync needs content-hash chunk IDs (text_processing id_mode='content')")
+
+        start = time.perf_counter()
+        manifest = self._manifest()
+        collection_name = self.uploader.collection_name
+        filename = file_path.split('/')[-1]
+
+        # Chunking is cheap next to embedding - the whole file is chunked to diff it
+        chunks = list(self.chunker.iter_chunks(self.processor.iter_document(file_path, category, tags, title)))
+        current = {chunk['metadata']['chunk_id']: chunk_fingerprint(chunk) for chunk in chunks}
+
+        previous = manifest.get(collection_name, filename)
+        untracked = previous is None
+        previous = previous or {}
+
+        changed = [chunk for chunk in chunks if previous.get(chunk['metadata']['chunk_id']) != current[chunk['metadata']['chunk_id']]]
+        updated_ids = [chunk['metadata']['chunk_id'] for chunk in changed if chunk['metadata']['chunk_id'] in previous]
+        removed_ids = [chunk_id for chunk_id in previous if chunk_id not in current]
+
+        stats = {
+            'file': file_path,
+            'status': 'success',
+            'added': len(changed) - len(updated_ids),
+            'updated': len(updated_ids),
+            'removed': len(removed_ids),
+            'unchanged': len(current) - len(changed),
+            'uploaded_count': 0
+        }
+        print(f"Sync {filename}: {stats['added']} new, {stats['updated']} updated, "
+              f"{stats['removed']} removed, {stats['unchanged']} unchanged chunks")
+
+        try:
+            if untracked and replace_untracked:
+                self.uploader.delete_filename(filename)
+
+            # A metadata change can move a chunk to another category partition -
+            # drop the old row first, the upsert below only replaces within a partition
+            self.uploader.delete_chunks(removed_ids + updated_ids)
+
+            if changed:
+                upload_result = self.uploader.upload_batches(
+                    self.embedder.iter_embedded_batches(iter(changed), self.embed_batch_size), upsert=True
+                )
+                stats['uploaded_count'] = upload_result['uploaded_count']
+                if upload_result['status'] != 'success' or upload_result.get('failed_count'):
+                    raise RuntimeError(upload_result.get('error') or f"{upload_result['failed_count']} chunks not converted")
+        except Exception as e:
+            # The manifest keeps the previous state - re-running the sync redoes the same diff
+            print(f"Sync of {filename} failed: {e}")
+            stats.update(status='failed', error=str(e))
+        else:
+            manifest.set(collection_name, filename, current)
+            manifest.save()
+
+        stats['total_seconds'] = time.perf_counter() - start
+        return stats
+
+    # Delete a source file's chunks from the collection and the manifest
+    def remove_file(self, filename: str) -> int:
+        manifest = self._manifest()
+        collection_name = self.uploader.collection_name
+        previous = manifest.get(collection_name, filename)
+        if previous is None:
+            print(f"{filename} is not in the manifest")
+            return 0
+
+        removed = self.uploader.delete_chunks(previous)
+        manifest.remove(collection_name, filename)
+        manifest.save()
+        print(f"Removed {removed} chunks of {filename}")
+        return removed
+
+    def show_stats(self):
+        if not self.stats:
+            print("No ingestion run yet")
+            return
+
+        print(f"Ingestion {self.stats['status']}: {self.stats['uploaded_count']} chunks "
+              f"in {self.stats['total_seconds']:.2f}s")
+        for name, stage in self.stats['stages'].items():
+            print(f"  {name}: {stage['items']} items, {stage['seconds']:.2f}s "
+                  f"({stage['items_per_second']:.0f}/s)")
\ No newline at end of file
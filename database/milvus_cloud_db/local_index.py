@@ -0,0 +1,211 @@
+import os
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from pymilvus import MilvusClient
+import numpy as np
+from database.milvus_cloud_db.zilliz_uploader import index_metric_type
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+
+# Snapshot element types (float16 / int8 come from a vector_codec collection)
+SNAPSHOT_DTYPES = (np.float32, np.float16, np.int8)
+
+# Rows upcast to float32 per scoring block - reduced-precision snapshots are never copied whole
+BLOCK_ROWS = 65536
+
+# Hit compatible with pymilvus search results (hit.score, hit.entity.get)
+class local_hit:
+
+    def __init__(self, score: float, entity: Dict[str, Any]):
+        self.score = score
+        self.entity = entity
+
+# Check a stored row against a retriever filter dictionary
+def matches_filters(row: Dict, filters: Optional[Dict]) -> bool:
+    if not filters:
+        return True
+
+    for field, values in filters.items():
+        values = values if isinstance(values, list) else [values]
+        stored = row.get(field)
+
+        if field in ['tags', 'category']:
+            # Same semantics as `field like "%value%"` on the JSON string
+            stored = stored if isinstance(stored, str) else json.dumps(stored)
+            if not any(str(value) in stored for value in values):
+                return False
+        elif not any(str(stored) == str(value) for value in values):
+            return False
+
+    return True
+
+# In-process replica of a Zilliz collection: memory-mapped float32 matrix + metadata table
+class local_index:
+
+    def __init__(self, snapshot_path: str, mmap: bool = True):
+        self.snapshot_path = snapshot_path
+
+        with open(os.path.join(snapshot_path, METADATA_FILE), "r") as f:
+            metadata = json.load(f)
+
+        self.collection_name = metadata.get('collection_name')
+        self.metric_type = metadata.get('metric_type', 'COSINE')
+        self.rows: List[Dict] = metadata['rows']
+
+        self.embeddings = np.load(
+            os.path.join(snapshot_path, EMBEDDINGS_FILE),
+            mmap_mode='r' if mmap else None
+        )
+        if self.embeddings.dtype not in SNAPSHOT_DTYPES:
+            raise ValueError(f"Snapshot embeddings must be float32, float16 or int8, got {self.embeddings.dtype}")
+        if len(self.rows) != self.embeddings.shape[0]:
+            raise ValueError("Snapshot metadata and embeddings have different row counts")
+
+        self.embedding_dim = self.embeddings.shape[1] if self.embeddings.ndim == 2 else 0
+        self._norms = np.zeros(len(self.rows), dtype=np.float32)
+        for start, block in self._blocks():
+            self._norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        self._norms[self._norms == 0] = 1.0
+
+        # Row lookup by primary key (built on first hydrate)
+        self._id_map: Optional[Dict[Any, int]] = None
+
+        # Filter masks are cached per (field, values) - filters repeat across turns
+        self._mask_cache: Dict[str, np.ndarray] = {}
+        self._mask_lock = threading.Lock()
+
+        print(f"Local index loaded: {len(self.rows)} rows from {snapshot_path}")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # (start row, float32 block) pairs; float32 snapshots are yielded as views
+    def _blocks(self):
+        for start in range(0, len(self.rows), BLOCK_ROWS):
+            yield start, np.asarray(self.embeddings[start:start + BLOCK_ROWS], dtype=np.float32)
+
+    # Fetch rows by primary key (missing ids are skipped)
+    def get(self, ids: List[Any]) -> List[Dict]:
+        if self._id_map is None:
+            self._id_map = {row.get('id'): i for i, row in enumerate(self.rows)}
+
+        return [self.rows[self._id_map[i]] for i in ids if i in self._id_map]
+
+    # Boolean row mask for a filter dictionary
+    def _filter_mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+
+        key = json.dumps(filters, sort_keys=True, default=str)
+        with self._mask_lock:
+            mask = self._mask_cache.get(key)
+            if mask is None:
+                mask = np.fromiter(
+                    (matches_filters(row, filters) for row in self.rows),
+                    dtype=bool,
+                    count=len(self.rows)
+                )
+                self._mask_cache[key] = mask
+            return mask
+
+    # Search N query vectors at once; returns one hit list per query, best first
+    def search_many(self,
+                    query_embeddings: List[List[float]],
+                    limit: int,
+                    filters: Optional[Dict] = None) -> List[List[local_hit]]:
+        if not len(self.rows):
+            return [[] for _ in query_embeddings]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        scores = np.empty((len(queries), len(self.rows)), dtype=np.float32)
+        for start, block in self._blocks():
+            scores[:, start:start + len(block)] = queries @ block.T
+
+        if self.metric_type == 'COSINE':
+            query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            query_norms[query_norms == 0] = 1.0
+            scores = scores / (query_norms * self._norms[None, :])
+
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            scores = np.where(mask[None, :], scores, -np.inf)
+
+        limit = min(limit, len(self.rows))
+        results = []
+        for row_scores in scores:
+            top = np.argpartition(-row_scores, limit - 1)[:limit]
+            top = top[np.argsort(-row_scores[top])]
+            results.append([
+                local_hit(float(row_scores[i]), self.rows[i])
+                for i in top if np.isfinite(row_scores[i])
+            ])
+
+        return results
+
+    def search(self,
+               query_embedding: List[float],
+               limit: int,
+               filters: Optional[Dict] = None) -> List[local_hit]:
+        return self.search_many([query_embedding], limit, filters)[0]
+
+# Stored vector as a numpy row (float16 vectors may come back as raw bytes)
+def _to_vector(value, dtype) -> np.ndarray:
+    if isinstance(value, list) and value and isinstance(value[0], bytes):
+        value = value[0]
+    if isinstance(value, bytes):
+        return np.frombuffer(value, dtype=dtype)
+    return np.asarray(value, dtype=dtype)
+
+# Export a Zilliz collection into a local snapshot directory (dtype follows the collection's codec)
+def export_snapshot(client: MilvusClient,
+                    collection_name: str,
+                    snapshot_path: str,
+                    output_fields: List[str],
+                    metric_type: Optional[str] = None,
+                    batch_size: int = 1000,
+                    dtype=np.float32) -> Dict:
+
+    os.makedirs(snapshot_path, exist_ok=True)
+    metric_type = metric_type or index_metric_type(client, collection_name)
+    fields = [field for field in output_fields if field != 'embedding'] + ['embedding']
+
+    rows = []
+    vectors = []
+    iterator = client.query_iterator(
+        collection_name=collection_name,
+        batch_size=batch_size,
+        filter="",
+        output_fields=fields
+    )
+
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            for entity in batch:
+                vectors.append(_to_vector(entity.pop('embedding'), dtype))
+                rows.append(entity)
+            print(f"Exported {len(rows)} rows from '{collection_name}'")
+    finally:
+        iterator.close()
+
+    embeddings = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=dtype)
+    np.save(os.path.join(snapshot_path, EMBEDDINGS_FILE), embeddings)
+
+    with open(os.path.join(snapshot_path, METADATA_FILE), "w") as f:
+        json.dump({
+            'collection_name': collection_name,
+            'metric_type': metric_type,
+            'rows': rows
+        }, f)
+
+    print(f"Snapshot written: {len(rows)} rows to {snapshot_path}")
+    return {
+        'collection_name': collection_name,
+        'row_count': len(rows),
+        'embedding_dim': embeddings.shape[1] if embeddings.ndim == 2 else 0,
+        'snapshot_path': snapshot_path
+    }
\ No newline at end of file
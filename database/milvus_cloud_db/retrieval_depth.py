@@ -0,0 +1,74 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+# Extra candidates fetched per requested result when hits may be dropped after the search
+OVERFETCH_FACTOR = int(os.getenv("SEARCH_OVERFETCH_FACTOR", "2"))
+
+# Search limit for top_k results - over-fetch only when a threshold or a post-filter
+# (hybrid fusion) can discard hits, otherwise exactly top_k
+def search_limit(top_k: int, threshold: Optional[float] = None, post_filter: bool = False) -> int:
+    if threshold is not None or post_filter:
+        return top_k * OVERFETCH_FACTOR
+    return top_k
+
+# Per-node retrieval counters - hits fetched from Milvus, returned after threshold/top_k,
+# and consumed by the downstream node. Wasted = hits dropped after the fetch plus
+# returned results the consumer never read
+class retrieval_telemetry:
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'searches': 0, 'cache_hits': 0, 'fetched': 0, 'returned': 0, 'from_cache': 0, 'consumed': 0}
+        )
+        self._lock = threading.Lock()
+
+    # Called by the retrievers once per query (fetched is 0 on a result cache hit)
+    def record_search(self, node: str, fetched: int, returned: int, cached: bool = False):
+        with self._lock:
+            counters = self._counters[node]
+            counters['searches'] += 1
+            counters['fetched'] += fetched
+            counters['returned'] += returned
+            if cached:
+                counters['cache_hits'] += 1
+                counters['from_cache'] += returned
+
+    # Called by the node that reads the results, with how many it actually used
+    def record_consumed(self, node: str, consumed: int):
+        with self._lock:
+            self._counters[node]['consumed'] += consumed
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            report = {}
+            for node, counters in self._counters.items():
+                dropped = max(counters['fetched'] - (counters['returned'] - counters['from_cache']), 0)
+                unused = max(counters['returned'] - counters['consumed'], 0)
+                delivered = counters['fetched'] + counters['from_cache']
+                report[node] = dict(
+                    counters,
+                    dropped=dropped,
+                    unused=unused,
+                    wasted=dropped + unused,
+                    wasted_ratio=(dropped + unused) / delivered if delivered else 0.0
+                )
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def show(self):
+        for node, entry in sorted(self.stats().items()):
+            print(f"{node}: {entry['searches']} searches ({entry['cache_hits']} cached), "
+                  f"fetched {entry['fetched']}, returned {entry['returned']}, consumed {entry['consumed']}, "
+                  f"wasted {entry['wasted']} ({entry['dropped']} dropped, {entry['unused']} unused, "
+                  f"{entry['wasted_ratio']:.1%})")
+
+# Process-wide telemetry shared by both retrievers and the graph nodes
+_retrieval_telemetry = retrieval_telemetry()
+
+def get_retrieval_telemetry() -> retrieval_telemetry:
+    return _retrieval_telemetry
\ No newline at end of file
@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Union
+from database.milvus_cloud_db.zilliz_retriever import warm_up
+from database.milvus_cloud_db.zilliz_retriever_b import warm_up_b
+
+# Warm-up functions of the configured retrievers (plus any registered with register_warm_up),
+# each returning seconds per phase
+WARM_UPS: Dict[str, Callable[[], Dict[str, float]]] = {
+    'retriever_a': warm_up,
+    'retriever_b': warm_up_b
+}
+
+# Warm-ups running at once
+WARM_UP_WORKERS = 4
+
+_startup_executor = ThreadPoolExecutor(max_workers=WARM_UP_WORKERS, thread_name_prefix="warm-up")
+
+# Runs background warm-ups (one at a time) so startup isn't blocked
+_report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm-up-report")
+
+# Add a model to preload next to the retrievers (e.g. the Path A document grader)
+def register_warm_up(name: str, fn: Callable[[], Dict[str, float]]):
+    WARM_UPS[name] = fn
+
+def _run_warm_ups(raise_on_error: bool) -> Dict:
+    start = time.perf_counter()
+    futures = {name: _startup_executor.submit(fn) for name, fn in list(WARM_UPS.items())}
+
+    report = {}
+    for name, future in futures.items():
+        try:
+            report[name] = future.result()
+        except Exception as e:
+            report[name] = {'error': str(e)}
+    report['total'] = time.perf_counter() - start
+
+    print_startup_report(report)
+
+    failed = {name: entry['error'] for name, entry in report.items()
+              if isinstance(entry, dict) and 'error' in entry}
+    if failed and raise_on_error:
+        raise RuntimeError(f"Warm-up failed: {failed}")
+    return report
+
+# Build both retrievers and the registered models in parallel (model load + connection per
+# retriever) and report seconds per phase; background=True returns a Future so startup isn't blocked
+def warm_up_retrievers(background: bool = False, raise_on_error: bool = True) -> Union[Dict, Future]:
+    if background:
+        return _report_executor.submit(_run_warm_ups, False)
+    return _run_warm_ups(raise_on_error)
+
+def print_startup_report(report: Dict):
+    for name, entry in report.items():
+        if name == 'total':
+            continue
+        if 'error' in entry:
+            print(f"{name}: FAILED - {entry['error']}")
+        else:
+            phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in entry.items())
+            print(f"{name}: {phases or 'nothing to load'}")
+    print(f"Warm-up total: {report['total']:.2f}s")
\ No newline at end of file
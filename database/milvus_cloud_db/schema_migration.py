@@ -0,0 +1,101 @@
+import os
+import json
+import argparse
+from typing import Dict, List, Optional
+from pymilvus import MilvusClient
+from database.milvus_cloud_db.zilliz_uploader import zilliz_uploader, ARRAY_FIELDS
+from database.milvus_cloud_db.vector_codec import vector_codec
+
+# Fields copied from the legacy schema (embedding is added by the iterator request)
+MIGRATION_FIELDS = ["id", "text", "chunk_id", "total_chunks", "chunk_index", "char_count",
+                    "timestamp", "title", "tags", "category", "filename"]
+
+# Convert a legacy JSON-string value into a list of strings
+def _to_array(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return [str(value)]
+    return [str(v) for v in parsed] if isinstance(parsed, list) else [str(parsed)]
+
+# Copy a legacy collection into a new collection with native ARRAY tags/category
+def migrate_collection(client: MilvusClient,
+                       source_collection: str,
+                       target_collection: str,
+                       embedding_dim: int = 384,
+                       batch_size: int = 500,
+                       codec: Optional[vector_codec] = None) -> Dict:
+
+    if source_collection == target_collection:
+        raise ValueError("source_collection and target_collection must differ")
+    if not client.has_collection(source_collection):
+        raise ValueError(f"Collection '{source_collection}' does not exist")
+
+    # Creates the target with the current schema and scalar indexes
+    target = zilliz_uploader(None, None, target_collection, embedding_dim, client=client, codec=codec)
+    if not target.array_fields:
+        raise ValueError(f"Target collection '{target_collection}' already exists with the legacy schema")
+
+    iterator = client.query_iterator(
+        collection_name=source_collection,
+        batch_size=batch_size,
+        filter="",
+        output_fields=MIGRATION_FIELDS + ["embedding"]
+    )
+
+    migrated = 0
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+
+            # Rows are routed into the target's category partitions
+            partitions: Dict[str, List[Dict]] = {}
+            for row in batch:
+                for field in ARRAY_FIELDS:
+                    row[field] = _to_array(row.get(field))
+                # Re-encoded for the target's codec / metric
+                row['embedding'] = target.prepare_vector(row['embedding'])
+                partitions.setdefault(target.partition_for(row['category']) or "", []).append(row)
+
+            for partition_name, rows in partitions.items():
+                if partition_name:
+                    target.ensure_partition(partition_name)
+                client.insert(target_collection, rows, partition_name=partition_name)
+            migrated += len(batch)
+            print(f"Migrated {migrated} rows into '{target_collection}'")
+    finally:
+        iterator.close()
+
+    result = {
+        'source_collection': source_collection,
+        'target_collection': target_collection,
+        'migrated_count': migrated,
+        'status': 'success'
+    }
+
+    print(f"Migration complete: {migrated} rows")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate a collection to native ARRAY tags/category")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--embedding-dim", type=int, default=384)
+    parser.add_argument("--codec", help="Fitted vector_codec (.npz) for reduced-precision storage")
+    args = parser.parse_args()
+
+    migrate_collection(
+        MilvusClient(uri=os.getenv("ZILLIZ_URI"), token=os.getenv("ZILLIZ_TOKEN")),
+        args.source,
+        args.target,
+        embedding_dim=args.embedding_dim,
+        batch_size=args.batch_size,
+        codec=vector_codec.load(args.codec) if args.codec else None
+    )
\ No newline at end of file
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+# Cache scope - (uri, collection), the retriever registry key. The same collection
+# name on two endpoints (e.g. staging and production) never shares entries
+CacheScope = Tuple[str, str]
+
+# TTL + LRU cache for vector search results
+class search_cache:
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 300.0):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        # key -> (expires_at, scope, results)
+        self._entries: "OrderedDict[str, Tuple[float, CacheScope, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Hash of scope, embedding bytes, compiled filter expression, top_k, threshold, projection and mode
+    @staticmethod
+    def make_key(scope: CacheScope,
+                 query_embedding: List[float],
+                 filter_expr: Optional[str],
+                 top_k: int,
+                 threshold: Optional[float],
+                 output_fields: Optional[List[str]] = None,
+                 mode: str = "dense") -> str:
+        digest = hashlib.sha1()
+        digest.update(np.asarray(query_embedding, dtype=np.float32).tobytes())
+        digest.update(json.dumps([list(scope), filter_expr, top_k, threshold, output_fields, mode]).encode())
+        return digest.hexdigest()
+
+    # Return a copy of cached results, or None if missing/expired
+    def get(self, key: str) -> Optional[List[Dict]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(result) for result in entry[2]]
+
+    def put(self, key: str, scope: CacheScope, results: List[Dict]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, tuple(scope), [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    # Drop entries of one (uri, collection) scope (or everything) - called after uploads
+    def invalidate(self, scope: Optional[CacheScope] = None) -> int:
+        with self._lock:
+            if scope is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                scope = tuple(scope)
+                stale = [key for key, entry in self._entries.items() if entry[1] == scope]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+
+            self.invalidations += 1
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+# Process-wide cache shared by both retrievers
+_search_cache = search_cache(
+    max_size=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL", "300"))
+)
+
+def get_search_cache() -> search_cache:
+    return _search_cache
+
+# Bound methods called with the scope after every invalidation (e.g. retrievers refreshing
+# their BM25 index); held weakly so a dropped retriever is not kept alive
+_invalidation_listeners: List[weakref.WeakMethod] = []
+_listeners_lock = threading.Lock()
+
+def add_invalidation_listener(callback: Callable[[Optional[CacheScope]], None]):
+    with _listeners_lock:
+        _invalidation_listeners.append(weakref.WeakMethod(callback))
+
+# Invalidation hook - fresh uploads become visible immediately in this process
+def invalidate_search_cache(scope: Optional[CacheScope] = None) -> int:
+    removed = _search_cache.invalidate(scope)
+    if removed:
+        print(f"Search cache invalidated: {removed} entries ({'/'.join(scope) if scope else 'all collections'})")
+
+    with _listeners_lock:
+        _invalidation_listeners[:] = [ref for ref in _invalidation_listeners if ref() is not None]
+        listeners = [ref() for ref in _invalidation_listeners]
+    for listener in listeners:
+        if listener is None:
+            continue
+        try:
+            listener(scope)
+        except Exception as e:
+            print(f"Invalidation listener failed: {e}")
+    return removed
\ No newline at end of file
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from pymilvus import MilvusClient
+import numpy as np
+from database.milvus_cloud_db.local_index import matches_filters
+
+# Fields kept per document so BM25 hits honour the same filters as dense search
+FILTER_FIELDS = ["category", "tags", "filename", "title"]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Lowercased alphanumeric tokens - keeps short terms like "ssri" or "cbt" intact
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+# Fuse ranked id lists; each list contributes 1 / (k + rank) per id
+def reciprocal_rank_fusion(rankings: List[List[Any]], k: int = 60) -> List[Tuple[Any, float]]:
+    scores: Dict[Any, float] = {}
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+# In-process BM25 index over chunk texts
+class sparse_index:
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[Any] = []
+        self.rows: List[Dict] = []
+        self.doc_lens = np.zeros(0, dtype=np.float32)
+        self.avg_doc_len = 0.0
+
+        # term -> (doc indexes, term frequencies)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.idf: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # Build from stored rows (id, text and filter fields)
+    @classmethod
+    def from_rows(cls, rows: List[Dict], k1: float = 1.5, b: float = 0.75) -> "sparse_index":
+        index = cls(k1, b)
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        doc_lens = []
+
+        for doc, row in enumerate(rows):
+            tokens = tokenize(row.get('text', ''))
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(doc)
+                tfs.append(tf)
+
+            index.ids.append(row.get('id'))
+            index.rows.append({field: row.get(field) for field in FILTER_FIELDS if field in row})
+
+        index.doc_lens = np.asarray(doc_lens, dtype=np.float32)
+        index.postings = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in postings.items()
+        }
+        index._finalize()
+        return index
+
+    def _finalize(self):
+        total = len(self.ids)
+        self.avg_doc_len = float(self.doc_lens.mean()) if total else 0.0
+        self.idf = {
+            term: math.log(1.0 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, (docs, _) in self.postings.items()
+        }
+
+    # Top BM25 matches as (id, score), best first; filters use dense-search semantics
+    def search(self, query: str, limit: int, filters: Optional[Dict] = None) -> List[Tuple[Any, float]]:
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if not terms or not len(self.ids):
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        length_norm = self.k1 * (1.0 - self.b + self.b * self.doc_lens / max(self.avg_doc_len, 1e-9))
+
+        for term in terms:
+            docs, tfs = self.postings[term]
+            scores[docs] += self.idf[term] * tfs * (self.k1 + 1.0) / (tfs + length_norm[docs])
+
+        candidates = np.flatnonzero(scores > 0)
+        if filters:
+            candidates = np.asarray(
+                [doc for doc in candidates if matches_filters(self.rows[doc], filters)],
+                dtype=np.int64
+            )
+        if not len(candidates):
+            return []
+
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        return [(self.ids[doc], float(scores[doc])) for doc in candidates]
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                'k1': self.k1,
+                'b': self.b,
+                'ids': self.ids,
+                'rows': self.rows,
+                'doc_lens': self.doc_lens.tolist(),
+                'postings': {
+                    term: [docs.tolist(), tfs.tolist()] for term, (docs, tfs) in self.postings.items()
+                }
+            }, f)
+        os.replace(tmp_path, path)
+
+        print(f"Sparse index saved: {len(self.ids)} documents to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "sparse_index":
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        index = cls(data['k1'], data['b'])
+        index.ids = data['ids']
+        index.rows = data['rows']
+        index.doc_lens = np.asarray(data['doc_lens'], dtype=np.float32)
+        index.postings = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in data['postings'].items()
+        }
+        index._finalize()
+
+        print(f"Sparse index loaded: {len(index.ids)} documents from {path}")
+        return index
+
+# Build a sparse index from the texts stored in a Zilliz collection
+def build_sparse_index(client: MilvusClient,
+                       collection_name: str,
+                       batch_size: int = 1000,
+                       k1: float = 1.5,
+                       b: float = 0.75) -> sparse_index:
+
+    rows = []
+    iterator = client.query_iterator(
+        collection_name=collection_name,
+        batch_size=batch_size,
+        filter="",
+        output_fields=["id", "text"] + FILTER_FIELDS
+    )
+
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            rows.extend(batch)
+    finally:
+        iterator.close()
+
+    print(f"Building sparse index over {len(rows)} chunks from '{collection_name}'")
+    return sparse_index.from_rows(rows, k1, b)
+
+# Rows currently in a collection - a saved index covering another number of rows is stale
+def collection_row_count(client: MilvusClient, collection_name: str) -> int:
+    result = client.query(collection_name=collection_name, filter="", output_fields=["count(*)"])
+    return int(result[0]["count(*)"]) if result else 0
\ No newline at end of file
@@ -1,53 +1,129 @@
 import re
-from typing import Dict, List
+import hashlib
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 
+CHUNK_ID_MODES = ("content", "positional")
+
+# Words per tokenizer call in token-aware mode
+TOKENIZE_BATCH_SIZE = 4096
+
+# Largest share of a chunk repeated in the next one when overlap_size words don't fit in
+# a chunk (long words) - every such chunk moves on by at least a quarter of its words, so
+# the output stays linear in the input. Chunks longer than overlap_size words are not capped
+MAX_OVERLAP_SHARE = 0.75
+
+# Stable chunk ID - hash of the source file and the chunk text. occurrence tells
+# repeated identical chunks of one file apart, so the ID never depends on position
+def content_chunk_id(filename: str, text: str, occurrence: int = 0) -> str:
+    digest = hashlib.sha1(f"{filename}\x00{occurrence}\x00{text}".encode("utf-8")).hexdigest()
+    return digest[:24]
+
 
 class text_processing:
-    def __init__(self, chunk_size: int = 500, overlap_size: int = 50):
+    def __init__(self, chunk_size: int = 500, overlap_size: int = 50, id_mode: str = "content",
+                 tokenizer=None, max_tokens: Optional[int] = None):
+        if id_mode not in CHUNK_ID_MODES:
+            raise ValueError(f"Unknown chunk id mode '{id_mode}', expected one of {CHUNK_ID_MODES}")
         self.chunk_size = chunk_size
         self.overlap_size = overlap_size
+        self.id_mode = id_mode
+
+        # Token-aware mode - chunks are packed up to max_tokens word-pieces (special tokens
+        # included) instead of chunk_size characters; overlap stays in words
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens or (getattr(tokenizer, 'model_max_length', 512) if tokenizer is not None else None)
+
+        # Chunks over the limit (a single word longer than the budget) - the encoder truncates these
+        self.oversized_chunks = 0
+
+    # Token-aware chunker for a SentenceTransformer: its tokenizer and the length it
+    # truncates at (256 word-pieces for all-MiniLM-L6-v2)
+    @classmethod
+    def for_model(cls, model, overlap_size: int = 50, id_mode: str = "content") -> "text_processing":
+        return cls(overlap_size=overlap_size, id_mode=id_mode,
+                   tokenizer=model.tokenizer, max_tokens=model.max_seq_length)
+
+    # Size of a chunk's budget in the unit _word_costs counts
+    def _budget(self) -> int:
+        if self.tokenizer is None:
+            return self.chunk_size
+
+        special = self.tokenizer.num_special_tokens_to_add() if hasattr(self.tokenizer, 'num_special_tokens_to_add') else 2
+        return self.max_tokens - special
+
+    # Cost of each word - characters plus the joining space, or word-pieces (tokenized in
+    # batches; word-piece counts of whitespace-separated words add up to the text's count)
+    def _word_costs(self, words: List[str]) -> List[int]:
+        if self.tokenizer is None:
+            return [len(word) + 1 for word in words]
+
+        costs = []
+        for i in range(0, len(words), TOKENIZE_BATCH_SIZE):
+            encoded = self.tokenizer(words[i:i + TOKENIZE_BATCH_SIZE], add_special_tokens=False)['input_ids']
+            costs.extend(len(ids) for ids in encoded)
+        return costs
 
     # Split text into chunks with overlap
     def create_text_chunks(self, text: str) -> List[str]:
-        if len(text) <= self.chunk_size:
+        if self.tokenizer is None and len(text) <= self.chunk_size:
             return [text]
 
         words = text.split()
+        budget = self._budget()
+
+        # Prefix sums of word costs - the size of any word window is one subtraction,
+        # and the end of a chunk is a binary search instead of a running re-sum
+        prefix = [0, *accumulate(self._word_costs(words))]
+        total_words = len(words)
+
+        if self.tokenizer is not None and prefix[-1] <= budget:
+            return [text]
+
         chunks = []
-        current_chunk = []
-        current_length = 0
-
-        for word in words:
-            word_len = len(word) + 1  # +1 for space
-            if current_length + word_len > self.chunk_size and current_chunk:
-                chunks.append(" ".join(current_chunk))
-
-                # Overlap
-                overlap_words = (
-                    current_chunk[-self.overlap_size:]
-                    if len(current_chunk) > self.overlap_size
-                    else current_chunk
-                )
-                current_chunk = overlap_words + [word]
-                current_length = sum(len(w) + 1 for w in current_chunk)
+        start = 0
+        # Words that must be in the chunk - the word that ended the previous chunk opens the next one
+        min_end = 1
+
+        while start < total_words:
+            # Widest window from start that fits (a single word over the budget is its own chunk)
+            end = max(bisect_right(prefix, prefix[start] + budget, lo=start + 1) - 1, min_end)
+
+            chunks.append(" ".join(words[start:end]))
+            if self.tokenizer is not None and prefix[end] - prefix[start] > budget:
+                self.oversized_chunks += 1
+                print(f"Chunk of {prefix[end] - prefix[start]} tokens exceeds the {budget} token budget: {chunks[-1][:40]}...")
+
+            if end == total_words:
+                break
+
+            # Overlap - the last overlap_size words start the next chunk (same output as the
+            # original word loop). A chunk of overlap_size words or fewer would be repeated
+            # whole, so its overlap is capped at MAX_OVERLAP_SHARE of its words; overlap_size 0
+            # means no overlap (the word loop repeated the whole chunk, current_chunk[-0:])
+            if end - start > self.overlap_size:
+                next_start = end - self.overlap_size
             else:
-                current_chunk.append(word)
-                current_length += word_len
+                next_start = end - int((end - start) * MAX_OVERLAP_SHARE)
 
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+            # Token budgets are hard limits (and capped overlaps new) - the overlap is also
+            # trimmed so the next word fits beside it
+            if self.tokenizer is not None or end - start <= self.overlap_size:
+                next_start = min(max(next_start, bisect_left(prefix, prefix[end + 1] - budget)), end)
+
+            start = next_start
+            min_end = end + 1
 
         return chunks
 
-    # Process output from data_processing.py
-    def process(self, processed_data: List[Dict]) -> List[Dict]:
-        if not processed_data:
-            raise ValueError("No processed_data provided")
+    # Chunk records one at a time (streaming) - yields chunks as each record is split
+    def iter_chunks(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        # (filename, chunk text digest) -> times seen, for repeated chunks in content mode
+        occurrences: Dict[tuple, int] = {}
 
-        results = []
-        
-        for doc_idx, item in enumerate(processed_data):
+        for doc_idx, item in enumerate(records):
             text = item.get("text", "").strip()
             metadata = item.get("metadata", {}).copy()
 
@@ -59,10 +135,15 @@ class text_processing:
                     continue
 
                 # Generate chunk_id based on category
-                if 'category' in metadata and 'conversation' in metadata['category']:
-                    chunk_id = f"conv_doc{doc_idx}_chunk{chunk_idx}"
+                prefix = "conv_" if 'category' in metadata and 'conversation' in metadata['category'] else ""
+                if self.id_mode == "content":
+                    filename = metadata.get('filename', '')
+                    key = (filename, hashlib.sha1(chunk.encode("utf-8")).digest())
+                    occurrence = occurrences.get(key, 0)
+                    occurrences[key] = occurrence + 1
+                    chunk_id = f"{prefix}{content_chunk_id(filename, chunk, occurrence)}"
                 else:
-                    chunk_id = f"doc{doc_idx}_chunk{chunk_idx}"
+                    chunk_id = f"{prefix}doc{doc_idx}_chunk{chunk_idx}"
 
                 new_metadata = metadata.copy()
                 new_metadata.update({
@@ -73,10 +154,20 @@ class text_processing:
                     'timestamp': int(datetime.now().timestamp()),
                 })
 
-                results.append({
+                yield {
                     'text': chunk,
                     'metadata': new_metadata,
-                })
+                }
+
+    # Process output from data_processing.py; an optional (minhash) deduplicator drops
+    # near-duplicate chunks before they reach the encoder
+    def process(self, processed_data: List[Dict], deduplicator=None) -> List[Dict]:
+        if not processed_data:
+            raise ValueError("No processed_data provided")
+
+        results = list(self.iter_chunks(processed_data))
 
         print(f"Processed {len(results)} text chunks from {len(processed_data)} source documents")
+        if deduplicator is not None and results:
+            results = deduplicator.deduplicate(results)
         return results
\ No newline at end of file
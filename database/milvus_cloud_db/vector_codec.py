@@ -0,0 +1,174 @@
+import json
+import argparse
+from typing import Dict, List, Optional
+from pymilvus import DataType
+import numpy as np
+
+# Stored element types - float16 / int8 halve / quarter the bytes of every vector
+PRECISIONS = ("float32", "float16", "int8")
+
+_NUMPY_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Shared vector transform for storage: optional PCA projection, then reduced precision.
+# Uploader, both retrievers and local snapshots must use the same fitted codec.
+class vector_codec:
+
+    def __init__(self, precision: str = "float32", pca_dim: Optional[int] = None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+        self.precision = precision
+        self.pca_dim = pca_dim
+        self.input_dim: Optional[int] = None
+
+        # Fitted state - projection (input_dim x pca_dim) and global int8 scale
+        self.components: Optional[np.ndarray] = None
+        self.scale = 1.0
+
+    @property
+    def output_dim(self) -> int:
+        return self.pca_dim or self.input_dim
+
+    @property
+    def dtype(self):
+        return _NUMPY_DTYPES[self.precision]
+
+    # Milvus vector field type for encoded vectors
+    @property
+    def milvus_data_type(self) -> DataType:
+        if self.precision == "float16":
+            return DataType.FLOAT16_VECTOR
+        if self.precision == "int8":
+            return DataType.INT8_VECTOR
+        return DataType.FLOAT_VECTOR
+
+    # INT8_VECTOR fields only support HNSW
+    @property
+    def index_type(self) -> str:
+        return "HNSW" if self.precision == "int8" else "AUTOINDEX"
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.output_dim * np.dtype(self.dtype).itemsize
+
+    # Fit the projection and quantization scale on a sample of stored embeddings
+    def fit(self, vectors: np.ndarray) -> "vector_codec":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.input_dim = vectors.shape[1]
+
+        if self.pca_dim:
+            if self.pca_dim > self.input_dim:
+                raise ValueError(f"pca_dim {self.pca_dim} exceeds embedding dim {self.input_dim}")
+            # Uncentered projection - keeps dot products (and so cosine ranking) intact
+            _, _, vt = np.linalg.svd(vectors, full_matrices=False)
+            self.components = vt[:self.pca_dim].T.astype(np.float32)
+
+        if self.precision == "int8":
+            # One symmetric scale for all dimensions so cosine is preserved up to rounding
+            projected = self._project(vectors)
+            max_abs = float(np.percentile(np.abs(projected), 99.99))
+            self.scale = 127.0 / max_abs if max_abs > 0 else 1.0
+
+        return self
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors @ self.components if self.components is not None else vectors
+
+    # Encode float32 embeddings (N x input_dim) into storage vectors
+    def encode(self, vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if self.input_dim is not None and vectors.shape[1] != self.input_dim:
+            raise ValueError(f"Expected {self.input_dim}-dim embeddings, got {vectors.shape[1]}")
+
+        projected = self._project(vectors)
+
+        if self.precision == "int8":
+            return np.clip(np.rint(projected * self.scale), -127, 127).astype(np.int8)
+        return projected.astype(self.dtype)
+
+    def encode_one(self, vector) -> np.ndarray:
+        return self.encode(vector)[0]
+
+    # Storage vectors back to float32 (projected space) for scoring
+    def decode(self, encoded: np.ndarray) -> np.ndarray:
+        decoded = np.asarray(encoded, dtype=np.float32)
+        return decoded / self.scale if self.precision == "int8" else decoded
+
+    # Recall@k of codec-space search against float32 brute force, plus size reduction
+    def recall_report(self, vectors: np.ndarray, queries: np.ndarray, top_k: int = 10) -> Dict:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        queries = np.asarray(queries, dtype=np.float32)
+
+        exact = _top_k_cosine(vectors, queries, top_k)
+        approx = _top_k_cosine(self.decode(self.encode(vectors)), self.decode(self.encode(queries)), top_k)
+        recall = np.mean([len(set(e).intersection(a)) / len(e) for e, a in zip(exact, approx)])
+
+        report = {
+            'precision': self.precision,
+            'pca_dim': self.pca_dim,
+            'input_dim': self.input_dim,
+            'output_dim': self.output_dim,
+            'top_k': top_k,
+            'recall_at_k': float(recall),
+            'bytes_per_vector': self.bytes_per_vector,
+            'compression': (self.input_dim * 4) / self.bytes_per_vector
+        }
+
+        print(f"Codec {self.precision}/{self.output_dim}d: recall@{top_k} {report['recall_at_k']:.4f}, "
+              f"{report['compression']:.1f}x smaller")
+        return report
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            meta=np.asarray(json.dumps({
+                'precision': self.precision,
+                'pca_dim': self.pca_dim,
+                'input_dim': self.input_dim,
+                'scale': self.scale
+            })),
+            components=self.components if self.components is not None else np.zeros((0, 0), dtype=np.float32)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "vector_codec":
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            components = data['components']
+
+        codec = cls(meta['precision'], meta['pca_dim'])
+        codec.input_dim = meta['input_dim']
+        codec.scale = meta['scale']
+        codec.components = components if components.size else None
+        return codec
+
+# Exact cosine top-k indexes for each query
+def _top_k_cosine(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> List[List[int]]:
+    vector_norms = np.linalg.norm(vectors, axis=1)
+    vector_norms[vector_norms == 0] = 1.0
+    query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    query_norms[query_norms == 0] = 1.0
+
+    scores = (queries @ vectors.T) / (query_norms * vector_norms[None, :])
+    top_k = min(top_k, vectors.shape[0])
+    return [list(np.argpartition(-row, top_k - 1)[:top_k]) for row in scores]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit a storage codec on sample embeddings and report recall loss")
+    parser.add_argument("embeddings", help=".npy file of float32 embeddings (e.g. a local snapshot)")
+    parser.add_argument("output", help="Where to write the fitted codec (.npz)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float16")
+    parser.add_argument("--pca-dim", type=int)
+    parser.add_argument("--queries", type=int, default=200, help="Held-out sample rows used as queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    sample = np.load(args.embeddings).astype(np.float32)
+    rng = np.random.default_rng(0)
+    held_out = rng.choice(len(sample), size=min(args.queries, len(sample) // 2), replace=False)
+    train = np.delete(sample, held_out, axis=0)
+
+    codec = vector_codec(args.precision, args.pca_dim).fit(train)
+    codec.recall_report(train, sample[held_out], args.top_k)
+    codec.save(args.output)
+    print(f"Codec written to {args.output}")
\ No newline at end of file
@@ -1,12 +1,48 @@
 import os
+import time
+import asyncio
 import json
-from typing import Dict, List, Optional, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from pymilvus import MilvusClient
-from sentence_transformers import SentenceTransformer
-import torch
+import numpy as np
+from database.milvus_cloud_db.embedding_provider import get_embedding_provider
+from database.milvus_cloud_db.local_index import local_index
+from database.milvus_cloud_db.search_cache import get_search_cache, add_invalidation_listener
+from database.milvus_cloud_db.client_registry import get_client_pool, get_retriever_registry
+from database.milvus_cloud_db.retrieval_depth import OVERFETCH_FACTOR, search_limit, get_retrieval_telemetry
+from database.milvus_cloud_db.vector_codec import vector_codec
+from database.milvus_cloud_db.sparse_index import (
+    sparse_index, build_sparse_index, collection_row_count, reciprocal_rank_fusion
+)
+from database.milvus_cloud_db.zilliz_uploader import (
+    uses_array_fields, category_partition_name, list_category_partitions, index_metric_type
+)
 
-# Global retriever instance
-_retriever_instance = None
+# Registry alias of the retriever set up by configure_retriever (Path A)
+RETRIEVER_ALIAS = "retriever_a"
+
+# Search modes - dense only, or dense fused with BM25 by reciprocal rank
+SEARCH_MODES = ("dense", "hybrid")
+
+# Default vector search parameters (level trades recall for latency on AUTOINDEX);
+# metric_type is replaced by the collection's index metric
+DEFAULT_SEARCH_PARAMS = {"metric_type": "COSINE", "params": {"level": 1}}
+
+# Seconds before a category with no partition is looked up again (writes through
+# zilliz_uploader in this process refresh it straight away)
+PARTITION_REFRESH_SECONDS = float(os.getenv("PARTITION_REFRESH_SECONDS", "60"))
+
+# BM25 rebuilds after writes run here, one at a time, off the search path
+_sparse_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sparse-index")
+
+# Load the shared embedding model, recording how long it took
+def _load_provider(embedding_model: str, use_cuda: bool, backend: str, timings: Dict[str, float]):
+    start = time.perf_counter()
+    provider = get_embedding_provider(embedding_model, use_cuda, backend)
+    timings['embedding_model'] = time.perf_counter() - start
+    return provider
 
 # Simple Zilliz Retriever Class
 class zilliz_retriever:
@@ -17,31 +53,108 @@ class zilliz_retriever:
                  zilliz_token: str,
                  collection_name: str,
                  embedding_model: str = "all-MiniLM-L6-v2",
-                 use_cuda: bool = True):
+                 use_cuda: bool = True,
+                 local_index_path: Optional[str] = None,
+                 backend: str = "torch",
+                 sparse_index_path: Optional[str] = None,
+                 client: Optional[MilvusClient] = None,
+                 search_params: Optional[Dict] = None,
+                 codec_path: Optional[str] = None,
+                 hybrid: bool = False):
         
         self.uri = zilliz_uri
         self.token = zilliz_token
         self.collection_name = collection_name
         
-        if not self.uri or not self.token:
-            raise ValueError("Zilliz URI and token must be provided")
+        if not local_index_path and client is None and (not self.uri or not self.token):
+            raise ValueError("Zilliz URI and token (or a local index snapshot) must be provided")
         
-        # Initialize Zilliz client
-        self.client = MilvusClient(uri=self.uri, token=self.token)
+        # Seconds per startup phase (embedding_model, local_index, connect, total)
+        self.startup_timings: Dict[str, float] = {}
+        startup = time.perf_counter()
+        
+        # Model load runs on a worker thread while the index and connection are set up
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retriever-startup")
+        provider_future = pool.submit(_load_provider, embedding_model, use_cuda, backend, self.startup_timings)
+        try:
+            self._setup_storage(client, local_index_path, codec_path)
+            self.embedding_provider = provider_future.result()
+        finally:
+            pool.shutdown(wait=False)
+        
+        self.search_params = search_params or dict(DEFAULT_SEARCH_PARAMS, metric_type=self.metric_type)
         
-        # Check collection exists
-        if not self.client.has_collection(self.collection_name):
-            raise ValueError(f"Collection '{self.collection_name}' does not exist")
+        self.embedding_model = self.embedding_provider.model
+        self.embedding_dim = self.embedding_provider.embedding_dim
         
-        # Initialize embedding model
-        device = 'cuda' if use_cuda and torch.cuda.is_available() else 'cpu'
-        self.embedding_model = SentenceTransformer(embedding_model, device=device)
-        self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        # Shared TTL result cache (invalidated by zilliz_uploader after inserts)
+        self.search_cache = get_search_cache()
+        self.cache_scope = get_retriever_registry().make_key(self.uri, self.collection_name, local_index_path)
+        self.telemetry = get_retrieval_telemetry()
+        
+        # BM25 index for hybrid mode - built by warm_up when hybrid is set (else on the first
+        # hybrid search), loaded from disk when still current, rebuilt in the background after writes
+        self.hybrid = hybrid
+        self.sparse_index_path = sparse_index_path
+        self.sparse_index = None
+        self._sparse_lock = threading.Lock()
+        self._sparse_dirty = False
+        self._sparse_refreshing = False
+        add_invalidation_listener(self._on_collection_changed)
+        
+        self.startup_timings['total'] = time.perf_counter() - startup
+        print("Retriever startup: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_timings.items()))
+    
+    # Codec, local replica and Zilliz connection (everything except the embedding model)
+    def _setup_storage(self,
+                       client: Optional[MilvusClient],
+                       local_index_path: Optional[str],
+                       codec_path: Optional[str]):
+        
+        # Storage codec of the collection - queries are encoded the same way as stored vectors
+        self.codec = vector_codec.load(codec_path) if codec_path else None
+        
+        # Optional in-process replica - serves searches without the network
+        phase_start = time.perf_counter()
+        self.local_index = local_index(local_index_path) if local_index_path else None
+        self.startup_timings['local_index'] = time.perf_counter() - phase_start
+        
+        # Initialize Zilliz client
+        phase_start = time.perf_counter()
+        self.metric_type = self.local_index.metric_type if self.local_index is not None else "COSINE"
+        self.client = None
+        self.array_fields = False
+        self.category_partitions = set()
+        # Partition name -> when it was last found missing (negative lookup cache)
+        self._missing_partitions: Dict[str, float] = {}
+        if client is not None or (self.uri and self.token):
+            try:
+                # An existing connection (e.g. local Milvus Lite) is reused as is,
+                # otherwise the endpoint's pooled client
+                self.client = client if client is not None else get_client_pool().acquire(self.uri, self.token)
+                
+                # Check collection exists
+                if not self.client.has_collection(self.collection_name):
+                    raise ValueError(f"Collection '{self.collection_name}' does not exist")
+                
+                # Native ARRAY tags/category (migrated schema) vs legacy JSON strings
+                self.array_fields = uses_array_fields(self.client, self.collection_name)
+                
+                # Per-category partitions written by zilliz_uploader (empty for legacy collections)
+                self.category_partitions = set(list_category_partitions(self.client, self.collection_name))
+                
+                # IP for collections of unit-length vectors, COSINE for older ones
+                self.metric_type = index_metric_type(self.client, self.collection_name)
+            except Exception as e:
+                if self.local_index is None:
+                    raise
+                print(f"Zilliz unavailable, using local index only: {e}")
+                self.client = None
+        self.startup_timings['connect'] = time.perf_counter() - phase_start
     
     # Convert query to embedding vector
-    def query_to_embedding(self, query: str) -> List[float]:
-        embedding = self.embedding_model.encode([query])
-        return embedding[0].tolist()
+    def query_to_embedding(self, query: str) -> np.ndarray:
+        return self.embedding_provider.embed_query(query)
     
     # Build filter expression from filter dictionary
     def _build_filter_expression(self, filters: Dict) -> str:
@@ -51,7 +164,16 @@ class zilliz_retriever:
         filter_conditions = []
         
         for field, values in filters.items():
-            if field in ['tags', 'category']:
+            if field in ['tags', 'category'] and self.array_fields:
+                # Native array fields - served by the INVERTED scalar index (Milvus 2.4+ servers)
+                if isinstance(values, list):
+                    if values:
+                        quoted = ", ".join(f'"{value}"' for value in values)
+                        filter_conditions.append(f"array_contains_any({field}, [{quoted}])")
+                else:
+                    filter_conditions.append(f'array_contains({field}, "{values}")')
+            
+            elif field in ['tags', 'category']:
                 # Handle array fields stored as JSON strings
                 if isinstance(values, list):
                     # For multiple values, create OR conditions
@@ -101,111 +223,524 @@ class zilliz_retriever:
         
         return " and ".join(filter_conditions) if filter_conditions else None
     
+    # Output fields requested from Zilliz for every hit
+    OUTPUT_FIELDS = ["id", "text", "chunk_id", "total_chunks", "chunk_index",
+                     "title", "tags", "category", "filename", "char_count", "timestamp"]
+    
+    # Ids-only projection - pair with hydrate() to fetch payloads late
+    ID_FIELDS = ["id"]
+    
+    # Copy projected fields from a stored entity (category/tags parsed from JSON strings)
+    def _project_entity(self, entity: Dict, output_fields: List[str]) -> Dict:
+        result = {}
+        
+        for field in output_fields:
+            if field in ['tags', 'category']:
+                value = entity.get(field, '[]')
+                try:
+                    value = json.loads(value)
+                except:
+                    pass
+            elif field == 'text':
+                value = entity.get('text', '')
+            else:
+                value = entity.get(field)
+            
+            result[field] = value
+        
+        return result
+    
+    # Format and threshold-filter the hits of one query
+    def _format_hits(self,
+                     hits,
+                     top_k: int,
+                     threshold: Optional[float],
+                     output_fields: Optional[List[str]] = None) -> List[Dict]:
+        output_fields = output_fields or self.OUTPUT_FIELDS
+        formatted_results = []
+        
+        for hit in hits:
+            similarity_score = float(hit.score)
+            
+            # Apply threshold filter
+            if threshold is not None and similarity_score < threshold:
+                continue
+            
+            result = {'id': hit.entity.get('id'), 'similarity_score': similarity_score}
+            result.update(self._project_entity(hit.entity, [f for f in output_fields if f != 'id']))
+            
+            formatted_results.append(result)
+        
+        # Sort by similarity score and return top_k
+        formatted_results.sort(key=lambda x: x['similarity_score'], reverse=True)
+        return formatted_results[:top_k]
+    
+    # Result cache key - embedding, compiled filter expression, top_k, threshold and projection
+    def _cache_key(self,
+                   query_embedding: np.ndarray,
+                   filters: Optional[Dict],
+                   top_k: int,
+                   threshold: Optional[float],
+                   output_fields: Optional[List[str]] = None,
+                   mode: str = "dense") -> str:
+        filter_expr = self._build_filter_expression(filters) if filters else None
+        return self.search_cache.make_key(self.cache_scope, query_embedding, filter_expr,
+                                          top_k, threshold, output_fields, mode)
+    
+    # Partitions to search for a category filter - the matching category partitions plus
+    # _default (multi-category rows); None searches the whole collection
+    def _partition_names(self, filters: Optional[Dict]) -> Optional[List[str]]:
+        if not self.category_partitions or not filters or 'category' not in filters:
+            return None
+        
+        categories = filters['category'] if isinstance(filters['category'], list) else [filters['category']]
+        if not categories:
+            return None
+        
+        names = [category_partition_name(category) for category in categories]
+        missing = [name for name in names if name not in self.category_partitions]
+        if missing:
+            # Partitions may have been added by an upload since this retriever started -
+            # a category without one is re-listed at most every PARTITION_REFRESH_SECONDS
+            now = time.monotonic()
+            if any(now - self._missing_partitions.get(name, float("-inf")) >= PARTITION_REFRESH_SECONDS
+                   for name in missing):
+                self.category_partitions = set(list_category_partitions(self.client, self.collection_name))
+                for name in missing:
+                    if name not in self.category_partitions:
+                        self._missing_partitions[name] = now
+                    else:
+                        self._missing_partitions.pop(name, None)
+        
+        return [name for name in names if name in self.category_partitions] + ["_default"]
+    
+    # Vector search on the local replica when loaded, otherwise on Zilliz
+    def _search(self,
+                query_embeddings: List[np.ndarray],
+                limit: int,
+                filters: Optional[Dict],
+                timeout: Optional[float] = None,
+                output_fields: Optional[List[str]] = None):
+        if self.codec is not None:
+            query_embeddings = list(self.codec.encode(query_embeddings))
+        
+        if self.local_index is not None:
+            return self.local_index.search_many(query_embeddings, limit, filters)
+        
+        # Build filter expression
+        filter_expr = self._build_filter_expression(filters) if filters else None
+        
+        return self.client.search(
+            collection_name=self.collection_name,
+            data=query_embeddings,
+            limit=limit,
+            search_params=self.search_params,
+            output_fields=output_fields or self.OUTPUT_FIELDS,
+            filter=filter_expr,
+            partition_names=self._partition_names(filters),
+            timeout=timeout
+        )
+    
+    # Rows the BM25 index is built from - the local replica if loaded, otherwise the collection
+    def _sparse_source_count(self) -> int:
+        if self.local_index is not None:
+            return len(self.local_index.rows)
+        return collection_row_count(self.client, self.collection_name)
+    
+    def _build_sparse_index(self) -> sparse_index:
+        if self.local_index is not None:
+            index = sparse_index.from_rows(self.local_index.rows)
+        else:
+            index = build_sparse_index(self.client, self.collection_name)
+        
+        if self.sparse_index_path:
+            index.save(self.sparse_index_path)
+        return index
+    
+    # A saved index is trusted only while it covers as many rows as the collection holds
+    def _load_or_build_sparse_index(self) -> sparse_index:
+        if self.sparse_index_path and os.path.exists(self.sparse_index_path):
+            index = sparse_index.load(self.sparse_index_path)
+            row_count = self._sparse_source_count()
+            if len(index) == row_count:
+                return index
+            print(f"Sparse index covers {len(index)} chunks, '{self.collection_name}' has {row_count} - rebuilding")
+        return self._build_sparse_index()
+    
+    # Load, build or reuse the BM25 index over this collection's chunk texts
+    def _get_sparse_index(self) -> sparse_index:
+        if self.sparse_index is not None:
+            return self.sparse_index
+        
+        with self._sparse_lock:
+            if self.sparse_index is None:
+                self.sparse_index = self._load_or_build_sparse_index()
+            return self.sparse_index
+    
+    # Build the BM25 index now (warm-up) and record how long it took
+    def prepare_sparse_index(self) -> float:
+        start = time.perf_counter()
+        self._get_sparse_index()
+        self.startup_timings['sparse_index'] = time.perf_counter() - start
+        return self.startup_timings['sparse_index']
+    
+    # Called after uploads / deletes (search cache invalidation) of any collection
+    def _on_collection_changed(self, scope: Optional[Tuple[str, str]]):
+        if scope is None or tuple(scope) == self.cache_scope:
+            # A write may have created a category partition - look missing ones up again
+            self._missing_partitions.clear()
+            self.rebuild_sparse_index()
+    
+    # Refresh the BM25 index after a write. A built index is rebuilt in the background and
+    # swapped in (searches keep the current one meanwhile); writes during a rebuild queue
+    # one more. An index not built yet only has its saved file dropped
+    def rebuild_sparse_index(self):
+        with self._sparse_lock:
+            if self.sparse_index is None:
+                if self.sparse_index_path and os.path.exists(self.sparse_index_path):
+                    os.remove(self.sparse_index_path)
+                return
+            
+            self._sparse_dirty = True
+            if self._sparse_refreshing:
+                return
+            self._sparse_refreshing = True
+        
+        _sparse_refresh_executor.submit(self._refresh_sparse_index)
+    
+    def _refresh_sparse_index(self):
+        while True:
+            with self._sparse_lock:
+                if not self._sparse_dirty:
+                    self._sparse_refreshing = False
+                    return
+                self._sparse_dirty = False
+            
+            try:
+                index = self._build_sparse_index()
+            except Exception as e:
+                print(f"Sparse index rebuild failed: {e}")
+                continue
+            
+            with self._sparse_lock:
+                self.sparse_index = index
+    
+    # Fuse dense candidates with BM25 hits; BM25-only ids are hydrated by primary key
+    def _fuse(self,
+              query: str,
+              dense_results: List[Dict],
+              top_k: int,
+              filters: Optional[Dict],
+              output_fields: Optional[List[str]]) -> List[Dict]:
+        
+        sparse_hits = self._get_sparse_index().search(query, top_k * OVERFETCH_FACTOR, filters)
+        fused = reciprocal_rank_fusion([
+            [result['id'] for result in dense_results],
+            [doc_id for doc_id, _ in sparse_hits]
+        ])[:top_k]
+        
+        by_id = {result['id']: result for result in dense_results}
+        missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+        for entity in self.hydrate(missing, output_fields):
+            by_id[entity['id']] = dict(entity, similarity_score=None)
+        
+        return [dict(by_id[doc_id], rrf_score=score) for doc_id, score in fused if doc_id in by_id]
+    
+    # Per-node telemetry for one query - skipped when the caller doesn't name its node.
+    # BM25-only hits hydrated by _fuse (no dense similarity_score) count as fetched too
+    def _record(self, node: Optional[str], hits, results: List[Dict], cached: bool = False):
+        if node:
+            fetched = len(hits) if hits is not None else 0
+            if not cached:
+                fetched += sum(1 for result in results if 'rrf_score' in result and result['similarity_score'] is None)
+            self.telemetry.record_search(node, fetched, len(results), cached)
+    
     # Main semantic search function
     def semantic_search(self,
                        query: str,
                        top_k: int,
                        filters: Optional[Dict] = None,
-                       threshold: Optional[float] = None) -> List[Dict]:
+                       threshold: Optional[float] = None,
+                       output_fields: Optional[List[str]] = None,
+                       mode: str = "dense",
+                       node: Optional[str] = None) -> List[Dict]:
+        
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
         
         # Convert query to embedding
         query_embedding = self.query_to_embedding(query)
         
-        # Build filter expression
-        filter_expr = self._build_filter_expression(filters) if filters else None
+        # Serve repeated searches from the result cache
+        cache_key = self._cache_key(query_embedding, filters, top_k, threshold, output_fields, mode)
+        cached_results = self.search_cache.get(cache_key)
+        if cached_results is not None:
+            self._record(node, None, cached_results, cached=True)
+            return cached_results
         
         try:
-            # Perform vector search
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                data=[query_embedding],
-                limit=top_k * 2,  # Get extra results for threshold filtering
-                search_params={"metric_type": "COSINE", "params": {"level": 1}},
-                output_fields=["id", "text", "chunk_id", "total_chunks", "chunk_index",
-                             "title", "tags", "category", "filename", "char_count", "timestamp"],
-                filter=filter_expr
-            )
+            # Perform vector search (extra results only when threshold or fusion can drop hits)
+            limit = search_limit(top_k, threshold, post_filter=mode == "hybrid")
+            search_results = self._search([query_embedding], limit, filters,
+                                          output_fields=output_fields)
+            hits = search_results[0] if search_results else []
             
-            # Format and filter results
-            formatted_results = []
-            
-            for hits in search_results:
-                for hit in hits:
-                    similarity_score = float(hit.score)
-                    
-                    # Apply threshold filter
-                    if threshold is not None and similarity_score < threshold:
-                        continue
-                    
-                    # Parse category and tags from JSON strings
-                    try:
-                        category = json.loads(hit.entity.get('category', '[]'))
-                        tags = json.loads(hit.entity.get('tags', '[]'))
-                    except:
-                        category = hit.entity.get('category', '')
-                        tags = hit.entity.get('tags', '')
-                    
-                    result = {
-                        'id': hit.entity.get('id'),
-                        'similarity_score': similarity_score,
-                        'text': hit.entity.get('text', ''),
-                        'chunk_id': hit.entity.get('chunk_id'),
-                        'total_chunks': hit.entity.get('total_chunks'),
-                        'chunk_index': hit.entity.get('chunk_index'),
-                        'title': hit.entity.get('title'),
-                        'tags': tags,
-                        'category': category,
-                        'filename': hit.entity.get('filename'),
-                        'char_count': hit.entity.get('char_count'),
-                        'timestamp': hit.entity.get('timestamp')
-                    }
-                    
-                    formatted_results.append(result)
-            
-            # Sort by similarity score and return top_k
-            formatted_results.sort(key=lambda x: x['similarity_score'], reverse=True)
-            return formatted_results[:top_k]
+            if mode == "hybrid":
+                # All dense candidates take part in the fusion
+                candidates = self._format_hits(hits, limit, threshold, output_fields)
+                results = self._fuse(query, candidates, top_k, filters, output_fields)
+            else:
+                results = self._format_hits(hits, top_k, threshold, output_fields)
+            self._record(node, hits, results)
+            self.search_cache.put(cache_key, self.cache_scope, results)
+            return results
             
         except Exception as e:
             print(f"Search error: {e}")
             return []
+    
+    # Batched semantic search - one encoder batch and one search request for N queries
+    def semantic_search_many(self,
+                            queries: List[str],
+                            top_k: int,
+                            filters: Optional[Dict] = None,
+                            threshold: Optional[float] = None,
+                            output_fields: Optional[List[str]] = None,
+                            mode: str = "dense",
+                            node: Optional[str] = None) -> List[List[Dict]]:
+        
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        
+        query_embeddings = self.embedding_provider.embed_queries(queries)
+        
+        # Only cache misses go to the search request
+        cache_keys = [self._cache_key(embedding, filters, top_k, threshold, output_fields, mode)
+                      for embedding in query_embeddings]
+        results = [self.search_cache.get(key) for key in cache_keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        for result in results:
+            if result is not None:
+                self._record(node, None, result, cached=True)
+        
+        if not missing:
+            return results
+        
+        try:
+            limit = search_limit(top_k, threshold, post_filter=mode == "hybrid")
+            search_results = self._search([query_embeddings[i] for i in missing], limit, filters,
+                                          output_fields=output_fields)
+            
+            for i, hits in zip(missing, search_results):
+                if mode == "hybrid":
+                    candidates = self._format_hits(hits, limit, threshold, output_fields)
+                    results[i] = self._fuse(queries[i], candidates, top_k, filters, output_fields)
+                else:
+                    results[i] = self._format_hits(hits, top_k, threshold, output_fields)
+                self._record(node, hits, results[i])
+                self.search_cache.put(cache_keys[i], self.cache_scope, results[i])
+            
+            return results
+            
+        except Exception as e:
+            print(f"Search error: {e}")
+            return [result if result is not None else [] for result in results]
+    
+    # Async semantic search - encoding on the bounded encoder pool, search off the event loop
+    async def asemantic_search(self,
+                               query: str,
+                               top_k: int,
+                               filters: Optional[Dict] = None,
+                               threshold: Optional[float] = None,
+                               timeout: Optional[float] = None,
+                               output_fields: Optional[List[str]] = None,
+                               mode: str = "dense",
+                               node: Optional[str] = None) -> List[Dict]:
+        
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        
+        try:
+            return await asyncio.wait_for(
+                self._asemantic_search(query, top_k, filters, threshold, timeout, output_fields, mode, node),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"Search timed out after {timeout}s")
+            return []
+        except Exception as e:
+            print(f"Search error: {e}")
+            return []
+    
+    async def _asemantic_search(self,
+                                query: str,
+                                top_k: int,
+                                filters: Optional[Dict],
+                                threshold: Optional[float],
+                                timeout: Optional[float],
+                                output_fields: Optional[List[str]] = None,
+                                mode: str = "dense",
+                                node: Optional[str] = None) -> List[Dict]:
+        
+        query_embedding = await self.embedding_provider.aembed_query(query)
+        
+        cache_key = self._cache_key(query_embedding, filters, top_k, threshold, output_fields, mode)
+        cached_results = self.search_cache.get(cache_key)
+        if cached_results is not None:
+            self._record(node, None, cached_results, cached=True)
+            return cached_results
+        
+        # Network (or local index) search runs in a worker thread; the server-side
+        # timeout stops the call even if the awaiting task was cancelled
+        limit = search_limit(top_k, threshold, post_filter=mode == "hybrid")
+        search_results = await asyncio.to_thread(
+            self._search, [query_embedding], limit, filters, timeout, output_fields
+        )
+        hits = search_results[0] if search_results else []
+        
+        if mode == "hybrid":
+            candidates = self._format_hits(hits, limit, threshold, output_fields)
+            results = await asyncio.to_thread(self._fuse, query, candidates, top_k, filters, output_fields)
+        else:
+            results = self._format_hits(hits, top_k, threshold, output_fields)
+        self._record(node, hits, results)
+        self.search_cache.put(cache_key, self.cache_scope, results)
+        return results
+    
+    # Batched late hydration - fetch payload fields for selected ids, in the given order
+    def hydrate(self, ids: List[str], output_fields: Optional[List[str]] = None) -> List[Dict]:
+        if not ids:
+            return []
+        
+        output_fields = output_fields or self.OUTPUT_FIELDS
+        fields = ['id'] + [f for f in output_fields if f != 'id']
+        
+        try:
+            if self.local_index is not None:
+                entities = self.local_index.get(ids)
+            else:
+                entities = self.client.get(
+                    collection_name=self.collection_name,
+                    ids=ids,
+                    output_fields=fields
+                )
+            
+            by_id = {entity.get('id'): self._project_entity(entity, fields) for entity in entities}
+            return [by_id[i] for i in ids if i in by_id]
+            
+        except Exception as e:
+            print(f"Hydrate error: {e}")
+            return []
+
+# Register retriever settings - cheap, no model load or network; the retriever is built on first use
+def configure_retriever(zilliz_uri: str, 
+                        zilliz_token: str, 
+                        collection_name: str, 
+                        embedding_model: str = "all-MiniLM-L6-v2",
+                        use_cuda: bool = True,
+                        local_index_path: Optional[str] = None,
+                        backend: str = "torch",
+                        sparse_index_path: Optional[str] = None,
+                        codec_path: Optional[str] = None,
+                        alias: Optional[str] = RETRIEVER_ALIAS,
+                        hybrid: bool = False) -> Tuple[str, str]:
+    
+    # Validate now so a missing env var fails at startup instead of on the first search
+    if not collection_name or (not local_index_path and (not zilliz_uri or not zilliz_token)):
+        raise ValueError("collection_name and either zilliz_uri/zilliz_token or local_index_path are required")
+    
+    # Registered per (uri, collection) - other environments or collections can be
+    # configured alongside and fetched by the returned key
+    return get_retriever_registry().register(zilliz_retriever, {
+        'zilliz_uri': zilliz_uri,
+        'zilliz_token': zilliz_token,
+        'collection_name': collection_name,
+        'embedding_model': embedding_model,
+        'use_cuda': use_cuda,
+        'local_index_path': local_index_path,
+        'backend': backend,
+        'sparse_index_path': sparse_index_path,
+        'codec_path': codec_path,
+        'hybrid': hybrid
+    }, alias)
+
+# Configured retriever (the Path A alias by default), built on first call
+# (concurrent callers wait for one build)
+def get_retriever(key: Union[str, Tuple[str, str]] = RETRIEVER_ALIAS) -> zilliz_retriever:
+    return get_retriever_registry().get(key)
+
+# Explicit warm-up - builds the retriever (and the BM25 index in hybrid mode) now and
+# returns its startup timings per phase
+def warm_up() -> Dict[str, float]:
+    retriever = get_retriever()
+    if retriever.hybrid and retriever.sparse_index is None:
+        retriever.prepare_sparse_index()
+    return dict(retriever.startup_timings)
 
-# Global initialization function
+# Global initialization function (eager: configure + build)
 def initialize_retriever(zilliz_uri: str, 
                         zilliz_token: str, 
                         collection_name: str, 
                         embedding_model: str = "all-MiniLM-L6-v2",
-                        use_cuda: bool = True) -> str:
+                        use_cuda: bool = True,
+                        local_index_path: Optional[str] = None,
+                        backend: str = "torch",
+                        sparse_index_path: Optional[str] = None,
+                        codec_path: Optional[str] = None) -> str:
     
-    # Validate parameters
-    if not zilliz_uri or not zilliz_token or not collection_name:
-        return "Error: zilliz_uri, zilliz_token, and collection_name are required"
-    
-    global _retriever_instance
-    try:
-        _retriever_instance = zilliz_retriever(
-            zilliz_uri=zilliz_uri,
-            zilliz_token=zilliz_token, 
-            collection_name=collection_name,
-            embedding_model=embedding_model,
-            use_cuda=use_cuda
-        )
-        return "Retriever initialized successfully"
-    except Exception as e:
-        return f"Initialization failed: {str(e)}"
+    configure_retriever(zilliz_uri, zilliz_token, collection_name, embedding_model, use_cuda,
+                        local_index_path, backend, sparse_index_path, codec_path)
+    get_retriever()
+    return "Retriever initialized successfully"
 
 # Main search function - only function needed for usage
 def semantic_search(query: str, 
                    top_k: int, 
                    filters: Optional[Dict] = None,
-                   threshold: Optional[float] = None) -> List[Dict]:
+                   threshold: Optional[float] = None,
+                   output_fields: Optional[List[str]] = None,
+                   mode: str = "dense",
+                   node: Optional[str] = None) -> List[Dict]:
     
     # Validate parameters
     if not query or not top_k:
         return [{"error": "query and top_k are required parameters"}]
     
-    # Check if retriever initialized
-    if _retriever_instance is None:
-        return [{"error": "Retriever not initialized. Call initialize_retriever first"}]
+    return get_retriever().semantic_search(query, top_k, filters, threshold, output_fields, mode, node)
+
+# Batched search function - returns one result list per query
+def semantic_search_many(queries: List[str], 
+                        top_k: int, 
+                        filters: Optional[Dict] = None,
+                        threshold: Optional[float] = None,
+                        output_fields: Optional[List[str]] = None,
+                        mode: str = "dense",
+                        node: Optional[str] = None) -> List[List[Dict]]:
+    
+    # Validate parameters
+    if not queries or not top_k:
+        return [[{"error": "queries and top_k are required parameters"}]]
+    
+    return get_retriever().semantic_search_many(queries, top_k, filters, threshold, output_fields, mode, node)
+
+# Async search function - for async graph nodes under ainvoke
+async def asemantic_search(query: str, 
+                          top_k: int, 
+                          filters: Optional[Dict] = None,
+                          threshold: Optional[float] = None,
+                          timeout: Optional[float] = None,
+                          output_fields: Optional[List[str]] = None,
+                          mode: str = "dense",
+                          node: Optional[str] = None) -> List[Dict]:
+    
+    # Validate parameters
+    if not query or not top_k:
+        return [{"error": "query and top_k are required parameters"}]
     
-    return _retriever_instance.semantic_search(query, top_k, filters, threshold)
\ No newline at end of file
+    # A first-use build loads the model - keep it off the event loop
+    retriever = get_retriever_registry().peek(RETRIEVER_ALIAS) or await asyncio.to_thread(get_retriever)
+    return await retriever.asemantic_search(query, top_k, filters, threshold, timeout, output_fields, mode, node)
+
+# Late hydration function - fetch payloads for ids returned by an ids-only search
+def hydrate(ids: List[str], output_fields: Optional[List[str]] = None) -> List[Dict]:
+    return get_retriever().hydrate(ids, output_fields)
\ No newline at end of file
@@ -1,10 +1,27 @@
 import os
-from typing import Dict, List, Optional
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from pymilvus import MilvusClient
-from sentence_transformers import SentenceTransformer
-import torch
+import numpy as np
+from database.milvus_cloud_db.embedding_provider import get_embedding_provider
+from database.milvus_cloud_db.local_index import local_index
+from database.milvus_cloud_db.search_cache import get_search_cache
+from database.milvus_cloud_db.client_registry import get_client_pool, get_retriever_registry
+from database.milvus_cloud_db.retrieval_depth import search_limit, get_retrieval_telemetry
+from database.milvus_cloud_db.vector_codec import vector_codec
+from database.milvus_cloud_db.zilliz_uploader import index_metric_type
 
-_retriever_instance = None
+RETRIEVER_ALIAS = "retriever_b"
+
+DEFAULT_SEARCH_PARAMS = {"metric_type": "COSINE", "params": {"level": 1}}
+
+def _load_provider(embedding_model: str, use_cuda: bool, backend: str, timings: Dict[str, float]):
+    start = time.perf_counter()
+    provider = get_embedding_provider(embedding_model, use_cuda, backend)
+    timings['embedding_model'] = time.perf_counter() - start
+    return provider
 
 class zilliz_retriever_b:
     
@@ -13,27 +30,74 @@ class zilliz_retriever_b:
                  zilliz_token: str,
                  collection_name: str,
                  embedding_model: str = "all-MiniLM-L6-v2",
-                 use_cuda: bool = True):
+                 use_cuda: bool = True,
+                 local_index_path: Optional[str] = None,
+                 backend: str = "torch",
+                 client: Optional[MilvusClient] = None,
+                 search_params: Optional[Dict] = None,
+                 codec_path: Optional[str] = None):
         
         self.uri = zilliz_uri
         self.token = zilliz_token
         self.collection_name = collection_name
         
-        if not self.uri or not self.token:
-            raise ValueError("Zilliz URI and token must be provided")
+        if not local_index_path and client is None and (not self.uri or not self.token):
+            raise ValueError("Zilliz URI and token (or a local index snapshot) must be provided")
+        
+        self.startup_timings: Dict[str, float] = {}
+        startup = time.perf_counter()
+        
+        # Model load overlaps with index load and connection setup
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retriever-b-startup")
+        provider_future = pool.submit(_load_provider, embedding_model, use_cuda, backend, self.startup_timings)
+        try:
+            self._setup_storage(client, local_index_path, codec_path)
+            self.embedding_provider = provider_future.result()
+        finally:
+            pool.shutdown(wait=False)
         
-        self.client = MilvusClient(uri=self.uri, token=self.token)
+        self.search_params = search_params or dict(DEFAULT_SEARCH_PARAMS, metric_type=self.metric_type)
+        
+        self.embedding_model = self.embedding_provider.model
+        self.embedding_dim = self.embedding_provider.embedding_dim
+        
+        self.search_cache = get_search_cache()
+        self.cache_scope = get_retriever_registry().make_key(self.uri, self.collection_name, local_index_path)
+        self.telemetry = get_retrieval_telemetry()
+        
+        self.startup_timings['total'] = time.perf_counter() - startup
+        print("Retriever B startup: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_timings.items()))
+    
+    def _setup_storage(self,
+                       client: Optional[MilvusClient],
+                       local_index_path: Optional[str],
+                       codec_path: Optional[str]):
+        self.codec = vector_codec.load(codec_path) if codec_path else None
         
-        if not self.client.has_collection(self.collection_name):
-            raise ValueError(f"Collection '{self.collection_name}' does not exist")
+        phase_start = time.perf_counter()
+        self.local_index = local_index(local_index_path) if local_index_path else None
+        self.startup_timings['local_index'] = time.perf_counter() - phase_start
         
-        device = 'cuda' if use_cuda and torch.cuda.is_available() else 'cpu'
-        self.embedding_model = SentenceTransformer(embedding_model, device=device)
-        self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        phase_start = time.perf_counter()
+        self.metric_type = self.local_index.metric_type if self.local_index is not None else "COSINE"
+        self.client = None
+        if client is not None or (self.uri and self.token):
+            try:
+                self.client = client if client is not None else get_client_pool().acquire(self.uri, self.token)
+                
+                if not self.client.has_collection(self.collection_name):
+                    raise ValueError(f"Collection '{self.collection_name}' does not exist")
+                
+                self.metric_type = index_metric_type(self.client, self.collection_name)
+            except Exception as e:
+                if self.local_index is None:
+                    raise
+                print(f"Zilliz unavailable, using local index only: {e}")
+                self.client = None
+        self.startup_timings['connect'] = time.perf_counter() - phase_start
     
-    def query_to_embedding(self, query: str) -> List[float]:
-        embedding = self.embedding_model.encode([query])
-        return embedding[0].tolist()
+    def query_to_embedding(self, query: str) -> np.ndarray:
+        return self.embedding_provider.embed_query(query)
     
     def _build_filter_expression(self, filters: Dict) -> str:
         if not filters:
@@ -74,88 +138,251 @@ class zilliz_retriever_b:
         
         return " and ".join(filter_conditions) if filter_conditions else None
     
+    OUTPUT_FIELDS = ["id", "text", "chunk_id", "total_chunks", "chunk_index",
+                     "status", "filename", "char_count", "timestamp"]
+    
+    def _format_hits(self, hits, top_k: int, threshold: Optional[float]) -> List[Dict]:
+        formatted_results = []
+        
+        for hit in hits:
+            similarity_score = float(hit.score)
+            
+            if threshold is not None and similarity_score < threshold:
+                continue
+            
+            result = {
+                'id': hit.entity.get('id'),
+                'similarity_score': similarity_score,
+                'text': hit.entity.get('text', ''),
+                'chunk_id': hit.entity.get('chunk_id'),
+                'total_chunks': hit.entity.get('total_chunks'),
+                'chunk_index': hit.entity.get('chunk_index'),
+                'status': hit.entity.get('status'),
+                'filename': hit.entity.get('filename'),
+                'char_count': hit.entity.get('char_count'),
+                'timestamp': hit.entity.get('timestamp')
+            }
+            
+            formatted_results.append(result)
+        
+        formatted_results.sort(key=lambda x: x['similarity_score'], reverse=True)
+        return formatted_results[:top_k]
+    
+    def _cache_key(self, query_embedding: np.ndarray, filters: Optional[Dict], top_k: int, threshold: Optional[float]) -> str:
+        filter_expr = self._build_filter_expression(filters) if filters else None
+        return self.search_cache.make_key(self.cache_scope, query_embedding, filter_expr, top_k, threshold)
+    
+    def _search(self,
+                query_embeddings: List[np.ndarray],
+                limit: int,
+                filters: Optional[Dict],
+                timeout: Optional[float] = None):
+        if self.codec is not None:
+            query_embeddings = list(self.codec.encode(query_embeddings))
+        
+        if self.local_index is not None:
+            return self.local_index.search_many(query_embeddings, limit, filters)
+        
+        filter_expr = self._build_filter_expression(filters) if filters else None
+        
+        return self.client.search(
+            collection_name=self.collection_name,
+            data=query_embeddings,
+            limit=limit,
+            search_params=self.search_params,
+            output_fields=self.OUTPUT_FIELDS,
+            filter=filter_expr,
+            timeout=timeout
+        )
+    
+    # Per-node telemetry for one query - skipped when the caller doesn't name its node
+    def _record(self, node: Optional[str], hits, results: List[Dict], cached: bool = False):
+        if node:
+            self.telemetry.record_search(node, len(hits) if hits is not None else 0, len(results), cached)
+    
     def semantic_search_b(self,
                        query: str,
                        top_k: int,
                        filters: Optional[Dict] = None,
-                       threshold: Optional[float] = None) -> List[Dict]:
+                       threshold: Optional[float] = None,
+                       node: Optional[str] = None) -> List[Dict]:
         
         query_embedding = self.query_to_embedding(query)
-        filter_expr = self._build_filter_expression(filters) if filters else None
+        
+        cache_key = self._cache_key(query_embedding, filters, top_k, threshold)
+        cached_results = self.search_cache.get(cache_key)
+        if cached_results is not None:
+            self._record(node, None, cached_results, cached=True)
+            return cached_results
         
         try:
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                data=[query_embedding],
-                limit=top_k * 2,
-                search_params={"metric_type": "COSINE", "params": {"level": 1}},
-                output_fields=["id", "text", "chunk_id", "total_chunks", "chunk_index",
-                             "status", "filename", "char_count", "timestamp"],
-                filter=filter_expr
-            )
+            # Over-fetch only when the threshold can drop hits
+            search_results = self._search([query_embedding], search_limit(top_k, threshold), filters)
+            hits = search_results[0] if search_results else []
             
-            formatted_results = []
+            results = self._format_hits(hits, top_k, threshold)
+            self._record(node, hits, results)
+            self.search_cache.put(cache_key, self.cache_scope, results)
+            return results
             
-            for hits in search_results:
-                for hit in hits:
-                    similarity_score = float(hit.score)
-                    
-                    if threshold is not None and similarity_score < threshold:
-                        continue
-                    
-                    result = {
-                        'id': hit.entity.get('id'),
-                        'similarity_score': similarity_score,
-                        'text': hit.entity.get('text', ''),
-                        'chunk_id': hit.entity.get('chunk_id'),
-                        'total_chunks': hit.entity.get('total_chunks'),
-                        'chunk_index': hit.entity.get('chunk_index'),
-                        'status': hit.entity.get('status'),
-                        'filename': hit.entity.get('filename'),
-                        'char_count': hit.entity.get('char_count'),
-                        'timestamp': hit.entity.get('timestamp')
-                    }
-                    
-                    formatted_results.append(result)
+        except Exception as e:
+            print(f"Search error: {e}")
+            return []
+    
+    def semantic_search_b_many(self,
+                            queries: List[str],
+                            top_k: int,
+                            filters: Optional[Dict] = None,
+                            threshold: Optional[float] = None,
+                            node: Optional[str] = None) -> List[List[Dict]]:
+        
+        query_embeddings = self.embedding_provider.embed_queries(queries)
+        
+        cache_keys = [self._cache_key(embedding, filters, top_k, threshold) for embedding in query_embeddings]
+        results = [self.search_cache.get(key) for key in cache_keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        for result in results:
+            if result is not None:
+                self._record(node, None, result, cached=True)
+        
+        if not missing:
+            return results
+        
+        try:
+            search_results = self._search([query_embeddings[i] for i in missing], search_limit(top_k, threshold), filters)
             
-            formatted_results.sort(key=lambda x: x['similarity_score'], reverse=True)
-            return formatted_results[:top_k]
+            for i, hits in zip(missing, search_results):
+                results[i] = self._format_hits(hits, top_k, threshold)
+                self._record(node, hits, results[i])
+                self.search_cache.put(cache_keys[i], self.cache_scope, results[i])
             
+            return results
+            
+        except Exception as e:
+            print(f"Search error: {e}")
+            return [result if result is not None else [] for result in results]
+    
+    async def asemantic_search_b(self,
+                                 query: str,
+                                 top_k: int,
+                                 filters: Optional[Dict] = None,
+                                 threshold: Optional[float] = None,
+                                 timeout: Optional[float] = None,
+                                 node: Optional[str] = None) -> List[Dict]:
+        
+        try:
+            return await asyncio.wait_for(
+                self._asemantic_search_b(query, top_k, filters, threshold, timeout, node),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"Search timed out after {timeout}s")
+            return []
         except Exception as e:
             print(f"Search error: {e}")
             return []
+    
+    async def _asemantic_search_b(self,
+                                  query: str,
+                                  top_k: int,
+                                  filters: Optional[Dict],
+                                  threshold: Optional[float],
+                                  timeout: Optional[float],
+                                  node: Optional[str] = None) -> List[Dict]:
+        
+        query_embedding = await self.embedding_provider.aembed_query(query)
+        
+        cache_key = self._cache_key(query_embedding, filters, top_k, threshold)
+        cached_results = self.search_cache.get(cache_key)
+        if cached_results is not None:
+            self._record(node, None, cached_results, cached=True)
+            return cached_results
+        
+        search_results = await asyncio.to_thread(
+            self._search, [query_embedding], search_limit(top_k, threshold), filters, timeout
+        )
+        hits = search_results[0] if search_results else []
+        
+        results = self._format_hits(hits, top_k, threshold)
+        self._record(node, hits, results)
+        self.search_cache.put(cache_key, self.cache_scope, results)
+        return results
+
+def configure_retriever_b(zilliz_uri: str, 
+                          zilliz_token: str, 
+                          collection_name: str, 
+                          embedding_model: str = "all-MiniLM-L6-v2",
+                          use_cuda: bool = True,
+                          local_index_path: Optional[str] = None,
+                          backend: str = "torch",
+                          codec_path: Optional[str] = None,
+                          alias: Optional[str] = RETRIEVER_ALIAS) -> Tuple[str, str]:
+    
+    if not collection_name or (not local_index_path and (not zilliz_uri or not zilliz_token)):
+        raise ValueError("collection_name and either zilliz_uri/zilliz_token or local_index_path are required")
+    
+    return get_retriever_registry().register(zilliz_retriever_b, {
+        'zilliz_uri': zilliz_uri,
+        'zilliz_token': zilliz_token,
+        'collection_name': collection_name,
+        'embedding_model': embedding_model,
+        'use_cuda': use_cuda,
+        'local_index_path': local_index_path,
+        'backend': backend,
+        'codec_path': codec_path
+    }, alias)
+
+def get_retriever_b(key: Union[str, Tuple[str, str]] = RETRIEVER_ALIAS) -> zilliz_retriever_b:
+    return get_retriever_registry().get(key)
+
+def warm_up_b() -> Dict[str, float]:
+    return dict(get_retriever_b().startup_timings)
 
 def initialize_retriever_b(zilliz_uri: str, 
                         zilliz_token: str, 
                         collection_name: str, 
                         embedding_model: str = "all-MiniLM-L6-v2",
-                        use_cuda: bool = True) -> str:
-    
-    if not zilliz_uri or not zilliz_token or not collection_name:
-        return "Error: zilliz_uri, zilliz_token, and collection_name are required"
-    
-    global _retriever_instance
-    try:
-        _retriever_instance = zilliz_retriever_b(
-            zilliz_uri=zilliz_uri,
-            zilliz_token=zilliz_token, 
-            collection_name=collection_name,
-            embedding_model=embedding_model,
-            use_cuda=use_cuda
-        )
-        return "Retriever initialized successfully"
-    except Exception as e:
-        return f"Initialization failed: {str(e)}"
+                        use_cuda: bool = True,
+                        local_index_path: Optional[str] = None,
+                        backend: str = "torch",
+                        codec_path: Optional[str] = None) -> str:
+    
+    configure_retriever_b(zilliz_uri, zilliz_token, collection_name, embedding_model, use_cuda,
+                          local_index_path, backend, codec_path)
+    get_retriever_b()
+    return "Retriever initialized successfully"
 
 def semantic_search_b(query: str, 
                    top_k: int, 
                    filters: Optional[Dict] = None,
-                   threshold: Optional[float] = None) -> List[Dict]:
+                   threshold: Optional[float] = None,
+                   node: Optional[str] = None) -> List[Dict]:
     
     if not query or not top_k:
         return [{"error": "query and top_k are required parameters"}]
     
-    if _retriever_instance is None:
-        return [{"error": "Retriever not initialized. Call initialize_retriever_b first"}]
+    return get_retriever_b().semantic_search_b(query, top_k, filters, threshold, node)
+
+def semantic_search_b_many(queries: List[str], 
+                        top_k: int, 
+                        filters: Optional[Dict] = None,
+                        threshold: Optional[float] = None,
+                        node: Optional[str] = None) -> List[List[Dict]]:
+    
+    if not queries or not top_k:
+        return [[{"error": "queries and top_k are required parameters"}]]
+    
+    return get_retriever_b().semantic_search_b_many(queries, top_k, filters, threshold, node)
+
+async def asemantic_search_b(query: str, 
+                            top_k: int, 
+                            filters: Optional[Dict] = None,
+                            threshold: Optional[float] = None,
+                            timeout: Optional[float] = None,
+                            node: Optional[str] = None) -> List[Dict]:
+    
+    if not query or not top_k:
+        return [{"error": "query and top_k are required parameters"}]
     
-    return _retriever_instance.semantic_search_b(query, top_k, filters, threshold)
\ No newline at end of file
+    retriever = get_retriever_registry().peek(RETRIEVER_ALIAS) or await asyncio.to_thread(get_retriever_b)
+    return await retriever.asemantic_search_b(query, top_k, filters, threshold, timeout, node)
\ No newline at end of file
@@ -1,7 +1,69 @@
 import os
+import re
 import json
-from typing import Dict, List, Optional
-from pymilvus import MilvusClient, DataType
+from typing import Dict, Iterable, List, Optional
+from pymilvus import MilvusClient, DataType, MilvusException
+import numpy as np
+from database.milvus_cloud_db.search_cache import invalidate_search_cache
+from database.milvus_cloud_db.client_registry import get_client_pool, get_retriever_registry
+from database.milvus_cloud_db.vector_codec import vector_codec
+
+# Metadata lists stored as native ARRAY<VARCHAR> fields (JSON strings in older collections)
+ARRAY_FIELDS = ['tags', 'category']
+ARRAY_MAX_CAPACITY = 64
+ARRAY_ELEMENT_LENGTH = 100
+
+# First Milvus release with INVERTED indexes on ARRAY fields (Milvus Lite has none)
+ARRAY_SCALAR_INDEX_MIN_VERSION = (2, 4)
+
+CATEGORY_PARTITION_PREFIX = "category_"
+
+# Partition holding the chunks of a single category
+def category_partition_name(category: str) -> str:
+    return CATEGORY_PARTITION_PREFIX + re.sub(r"[^0-9a-zA-Z_]", "_", str(category).strip().lower())
+
+# Category partitions of a collection (multi-category and legacy rows stay in _default)
+def list_category_partitions(client: MilvusClient, collection_name: str) -> List[str]:
+    return [p for p in client.list_partitions(collection_name) if p.startswith(CATEGORY_PARTITION_PREFIX)]
+
+# Check whether a collection stores tags/category as native arrays
+def uses_array_fields(client: MilvusClient, collection_name: str) -> bool:
+    description = client.describe_collection(collection_name)
+    for field in description.get('fields', []):
+        if field.get('name') in ARRAY_FIELDS:
+            return field.get('type') == DataType.ARRAY
+    return False
+
+# Check whether the server can build INVERTED indexes on ARRAY fields - "milvus_lite-x.y.z"
+# can't; "v2.4.x" / "Zilliz Cloud ... (Compatible with Milvus 2.4)" can from 2.4 on.
+# An unknown version is tried (create_index then reports the error)
+def supports_array_scalar_index(client: MilvusClient) -> bool:
+    try:
+        version = str(client.get_server_version())
+    except MilvusException:
+        return True
+    if version.startswith("milvus_lite"):
+        return False
+    match = re.search(r"(\d+)\.(\d+)", version)
+    return match is None or (int(match.group(1)), int(match.group(2))) >= ARRAY_SCALAR_INDEX_MIN_VERSION
+
+# Type and dimension of a collection's embedding field
+def embedding_field_spec(client: MilvusClient, collection_name: str):
+    description = client.describe_collection(collection_name)
+    for field in description.get('fields', []):
+        if field.get('name') == 'embedding':
+            return field.get('type'), int(field.get('params', {}).get('dim', 0))
+    return None, 0
+
+# Metric of a collection's vector index (older collections use COSINE)
+def index_metric_type(client: MilvusClient, collection_name: str) -> str:
+    for index_name in client.list_indexes(collection_name, field_name="embedding"):
+        return client.describe_index(collection_name, index_name).get('metric_type', 'COSINE')
+    return "COSINE"
+
+# Primary key of a chunk's row
+def row_id(chunk_id: str) -> str:
+    return f"id_{chunk_id}"
 
 class zilliz_uploader:
     
@@ -9,24 +71,47 @@ class zilliz_uploader:
                  zilliz_uri: str,
                  zilliz_token: str,
                  collection_name: str = "knowledge_base",
-                 embedding_dim: int = 384):
+                 embedding_dim: int = 384,
+                 client: Optional[MilvusClient] = None,
+                 partition_by_category: bool = True,
+                 codec: Optional[vector_codec] = None,
+                 metric_type: str = "IP"):
         
         # Get credentials from parameters or environment variables
         self.uri = zilliz_uri or os.getenv('MILVUS_URI')
         self.token = zilliz_token or os.getenv('MILVUS_TOKEN')
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
+        self.codec = codec
         
-        if not self.uri or not self.token:
-            raise ValueError("Zilliz URI and token must be provided via parameters or environment variables")
+        # Search cache scope of this collection - same (uri, collection) key as its retrievers
+        self.cache_scope = get_retriever_registry().make_key(self.uri, collection_name)
         
-        # Initialize client
-        print(f"Connecting to Zilliz Cloud: {self.uri}")
-        self.client = MilvusClient(uri=self.uri, token=self.token)
-        print("Successfully connected to Zilliz Cloud")
+        # Embeddings are unit length, so inner product ranks (and scores) exactly like COSINE
+        # without per-vector normalization; PCA / int8 codec vectors are not unit length
+        if codec is not None and (codec.pca_dim or codec.precision == "int8"):
+            metric_type = "COSINE"
+        self.metric_type = metric_type
+        self.partition_by_category = partition_by_category
+        self._partitions = set()
+        
+        if client is not None:
+            # Reuse an existing connection (migrations, local Milvus Lite)
+            self.client = client
+        else:
+            if not self.uri or not self.token:
+                raise ValueError("Zilliz URI and token must be provided via parameters or environment variables")
+            
+            # Shared client of this endpoint (same pool as the retrievers)
+            print(f"Connecting to Zilliz Cloud: {self.uri}")
+            self.client = get_client_pool().acquire(self.uri, self.token)
+            print("Successfully connected to Zilliz Cloud")
         
         # Setup collection
         self._setup_collection()
+        
+        if self.partition_by_category:
+            self._partitions = set(self.client.list_partitions(self.collection_name))
     
     def _create_collection_schema(self):
         schema = self.client.create_schema()
@@ -34,7 +119,11 @@ class zilliz_uploader:
         # Core fields
         schema.add_field("id", DataType.VARCHAR, max_length=200, is_primary=True)
         schema.add_field("text", DataType.VARCHAR, max_length=65535)
-        schema.add_field("embedding", DataType.FLOAT_VECTOR, dim=self.embedding_dim)
+        if self.codec is not None:
+            # Reduced precision / dimension storage
+            schema.add_field("embedding", self.codec.milvus_data_type, dim=self.codec.output_dim)
+        else:
+            schema.add_field("embedding", DataType.FLOAT_VECTOR, dim=self.embedding_dim)
         
         # Metadata fields
         schema.add_field("chunk_id", DataType.VARCHAR, max_length=100)
@@ -43,21 +132,38 @@ class zilliz_uploader:
         schema.add_field("char_count", DataType.INT64)
         schema.add_field("timestamp", DataType.INT64)
         schema.add_field("title", DataType.VARCHAR, max_length=500)
-        schema.add_field("tags", DataType.VARCHAR, max_length=1000)
-        schema.add_field("category", DataType.VARCHAR, max_length=500)
+        schema.add_field("tags", DataType.ARRAY, element_type=DataType.VARCHAR,
+                         max_capacity=ARRAY_MAX_CAPACITY, max_length=ARRAY_ELEMENT_LENGTH)
+        schema.add_field("category", DataType.ARRAY, element_type=DataType.VARCHAR,
+                         max_capacity=ARRAY_MAX_CAPACITY, max_length=ARRAY_ELEMENT_LENGTH)
         schema.add_field("filename", DataType.VARCHAR, max_length=255)
         
         return schema
     
     def _setup_collection(self):
         if self.client.has_collection(self.collection_name):
-            print(f"Collection '{self.collection_name}' already exists")
+            # Older collections keep tags/category as JSON strings
+            self.array_fields = uses_array_fields(self.client, self.collection_name)
+            print(f"Collection '{self.collection_name}' already exists (array fields: {self.array_fields})")
+            
+            # Vectors encoded with a different codec would be silently unsearchable
+            field_type, field_dim = embedding_field_spec(self.client, self.collection_name)
+            expected_type = self.codec.milvus_data_type if self.codec else DataType.FLOAT_VECTOR
+            expected_dim = self.codec.output_dim if self.codec else self.embedding_dim
+            if field_type is not None and (field_type != expected_type or field_dim != expected_dim):
+                raise ValueError(f"Collection '{self.collection_name}' stores {DataType(field_type).name} dim {field_dim}, "
+                                 f"expected {expected_type.name} dim {expected_dim}")
+            
+            self.metric_type = index_metric_type(self.client, self.collection_name)
             return
         
+        self.array_fields = True
         schema = self._create_collection_schema()
         
         index_params = self.client.prepare_index_params()
-        index_params.add_index("embedding", metric_type="COSINE")
+        index_params.add_index("embedding",
+                               index_type=self.codec.index_type if self.codec else "AUTOINDEX",
+                               metric_type=self.metric_type)
         
         self.client.create_collection(
             collection_name=self.collection_name,
@@ -66,6 +172,32 @@ class zilliz_uploader:
         )
         
         print(f"Created collection '{self.collection_name}' with schema")
+        
+        # Scalar indexes so array_contains filters don't scan (Milvus 2.4+, not Milvus Lite)
+        if not supports_array_scalar_index(self.client):
+            print("Scalar indexes skipped: server has no INVERTED index on ARRAY fields")
+            return
+        
+        scalar_params = self.client.prepare_index_params()
+        for field in ARRAY_FIELDS:
+            scalar_params.add_index(field, index_type="INVERTED")
+        try:
+            self.client.create_index(self.collection_name, scalar_params)
+        except MilvusException as e:
+            print(f"Scalar indexes not created: {e}")
+    
+    # Stored form of an embedding - float32 array handed to insert as is (no Python float lists)
+    def prepare_vector(self, embedding) -> np.ndarray:
+        if self.codec is not None:
+            return self.codec.encode_one(embedding)
+        
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self.metric_type == "IP":
+            # Inner product only equals cosine for unit-length vectors
+            norm = float(np.linalg.norm(vector))
+            if norm > 0 and abs(norm - 1.0) > 1e-3:
+                vector = vector / norm
+        return vector
     
     def _convert_chunk_to_zilliz_format(self, chunk: Dict) -> Dict:
         # Extract metadata
@@ -73,45 +205,70 @@ class zilliz_uploader:
         
         # Generate unique ID using chunk_id
         chunk_id = metadata.get('chunk_id', 'unknown')
-        unique_id = f"id_{chunk_id}"
+        unique_id = row_id(chunk_id)
         
-        # Convert arrays to JSON strings for storage
         tags = metadata.get('tags', [])
         category = metadata.get('category', [])
         
-        tags_json = json.dumps(tags) if isinstance(tags, list) else str(tags)
-        category_json = json.dumps(category) if isinstance(category, list) else str(category)
+        if self.array_fields:
+            # Native arrays of strings
+            tags_value = [str(tag) for tag in tags] if isinstance(tags, list) else [str(tags)]
+            category_value = [str(c) for c in category] if isinstance(category, list) else [str(category)]
+        else:
+            # Legacy schema - arrays as JSON strings
+            tags_value = json.dumps(tags) if isinstance(tags, list) else str(tags)
+            category_value = json.dumps(category) if isinstance(category, list) else str(category)
         
         # Build Zilliz data
         zilliz_data = {
             'id': unique_id,
             'text': chunk['text'],
-            'embedding': chunk['embedding'],
+            'embedding': self.prepare_vector(chunk['embedding']),
             'chunk_id': str(chunk_id),
             'total_chunks': metadata.get('total_chunks', 1),
             'chunk_index': metadata.get('chunk_index', 0),
             'char_count': metadata.get('char_count', 0),
             'timestamp': metadata.get('timestamp', 0),
             'title': metadata.get('title', ''),
-            'tags': tags_json,
-            'category': category_json,
+            'tags': tags_value,
+            'category': category_value,
             'filename': metadata.get('filename', '')
         }
         
         return zilliz_data
     
+    # Partition for a category list - single-category rows only; anything else stays in
+    # _default so a category search over (its partition + _default) never misses a row
+    def partition_for(self, category) -> Optional[str]:
+        if not self.partition_by_category:
+            return None
+        
+        if isinstance(category, list):
+            category = category[0] if len(category) == 1 else None
+        
+        return category_partition_name(category) if category else None
+    
+    def ensure_partition(self, partition_name: str):
+        if partition_name in self._partitions:
+            return
+        
+        if not self.client.has_partition(self.collection_name, partition_name):
+            self.client.create_partition(self.collection_name, partition_name)
+            print(f"Created partition '{partition_name}'")
+        self._partitions.add(partition_name)
+    
     def upload_chunks(self, embedded_chunks: List[Dict], batch_size: int = 100) -> Dict:
         if not embedded_chunks:
             raise ValueError("No embedded chunks to upload")
         
         print(f"Uploading {len(embedded_chunks)} chunks to collection '{self.collection_name}'")
         
-        # Convert chunks to Zilliz format
-        zilliz_data = []
+        # Convert chunks to Zilliz format, grouped by category partition
+        zilliz_data: Dict[Optional[str], List[Dict]] = {}
         for chunk in embedded_chunks:
             try:
                 converted_chunk = self._convert_chunk_to_zilliz_format(chunk)
-                zilliz_data.append(converted_chunk)
+                zilliz_data.setdefault(self.partition_for(chunk.get('metadata', {}).get('category', [])), []).append(converted_chunk)
             except Exception as e:
                 print(f"Error converting chunk: {e}")
                 continue
@@ -122,16 +279,24 @@ class zilliz_uploader:
         try:
             total_uploaded = 0
             
-            # Upload in batches
-            for i in range(0, len(zilliz_data), batch_size):
-                batch = zilliz_data[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (len(zilliz_data) + batch_size - 1) // batch_size
+            for partition_name, rows in zilliz_data.items():
+                if partition_name:
+                    self.ensure_partition(partition_name)
                 
-                print(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} chunks)")
-                
-                self.client.insert(self.collection_name, batch)
-                total_uploaded += len(batch)
+                # Upload in batches
+                for i in range(0, len(rows), batch_size):
+                    batch = rows[i:i + batch_size]
+                    batch_num = (i // batch_size) + 1
+                    total_batches = (len(rows) + batch_size - 1) // batch_size
+                    
+                    print(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} chunks) "
+                          f"to partition '{partition_name or '_default'}'")
+                    
+                    self.client.insert(self.collection_name, batch, partition_name=partition_name or "")
+                    total_uploaded += len(batch)
+            
+            # Cached search results for this collection are now stale
+            invalidate_search_cache(self.cache_scope)
             
             result = {
                 'uploaded_count': total_uploaded,
@@ -150,6 +315,69 @@ class zilliz_uploader:
                 'error': str(e)
             }
     
+    # Streaming upload - one insert per partition for each incoming batch of embedded chunks,
+    # so only the current batch is held in Zilliz row format. upsert=True replaces rows
+    # with the same ID instead of adding a second copy (safe to re-run)
+    def upload_batches(self, batches: Iterable[List[Dict]], upsert: bool = False) -> Dict:
+        write = self.client.upsert if upsert else self.client.insert
+        total_uploaded = 0
+        failed = 0
+        
+        try:
+            for batch in batches:
+                rows_by_partition: Dict[Optional[str], List[Dict]] = {}
+                for chunk in batch:
+                    try:
+                        rows_by_partition.setdefault(
+                            self.partition_for(chunk.get('metadata', {}).get('category', [])), []
+                        ).append(self._convert_chunk_to_zilliz_format(chunk))
+                    except Exception as e:
+                        print(f"Error converting chunk: {e}")
+                        failed += 1
+                
+                for partition_name, rows in rows_by_partition.items():
+                    if partition_name:
+                        self.ensure_partition(partition_name)
+                    write(self.collection_name, rows, partition_name=partition_name or "")
+                    total_uploaded += len(rows)
+            
+            status = 'success'
+            error = None
+        except Exception as e:
+            print(f"Error uploading chunks: {e}")
+            status = 'failed'
+            error = str(e)
+        
+        # Rows inserted before a failure are visible too
+        if total_uploaded:
+            invalidate_search_cache(self.cache_scope)
+        
+        result = {
+            'uploaded_count': total_uploaded,
+            'failed_count': failed,
+            'collection_name': self.collection_name,
+            'status': status
+        }
+        if error:
+            result['error'] = error
+        return result
+    
+    # Delete rows by chunk_id (primary keys are looked up in every partition)
+    def delete_chunks(self, chunk_ids: Iterable[str], batch_size: int = 1000) -> int:
+        ids = [row_id(chunk_id) for chunk_id in chunk_ids]
+        for i in range(0, len(ids), batch_size):
+            self.client.delete(self.collection_name, ids=ids[i:i + batch_size])
+        
+        if ids:
+            invalidate_search_cache(self.cache_scope)
+        return len(ids)
+    
+    # Delete every row of a source file (e.g. rows uploaded before content-hash IDs)
+    def delete_filename(self, filename: str):
+        escaped = filename.replace('\\', '\\\\').replace('"', '\\"')
+        self.client.delete(self.collection_name, filter=f'filename == "{escaped}"')
+        invalidate_search_cache(self.cache_scope)
+    
     def get_collection_stats(self) -> Dict:
         try:
             stats = self.client.get_collection_stats(self.collection_name)
@@ -157,7 +385,7 @@ class zilliz_uploader:
             return {
                 'collection_name': self.collection_name,
                 'total_entities': stats.get('row_count', 0),
-                'embedding_dimension': self.embedding_dim
+                'embedding_dimension': self.codec.output_dim if self.codec else self.embedding_dim
             }
             
         except Exception as e:
@@ -184,6 +412,7 @@ class zilliz_uploader:
         try:
             if self.client.has_collection(self.collection_name):
                 self.client.drop_collection(self.collection_name)
+                invalidate_search_cache(self.cache_scope)
                 print(f"Dropped collection: {self.collection_name}")
             else:
                 print(f"Collection {self.collection_name} does not exist")
@@ -0,0 +1,231 @@
+# Document relevance grading for Path A. Graders return a 1-100 relevance grade per
+# document ID, the scale filter_document_node thresholds on. The cross-encoder grader
+# runs locally on CPU; the LLM grader keeps the original structured-output prompt and
+# serves as its fallback
+
+import os
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Cross-encoder inference backends (same names as EMBEDDING_BACKEND)
+CROSS_ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Quantized ONNX weights shipped in the cross-encoder model repo
+CROSS_ENCODER_INT8_FILE = os.getenv("CROSS_ENCODER_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+# Interface: grade documents ({'id', 'text'}) against a query
+class DocumentGrader(ABC):
+
+    name = "base"
+
+    # Document ID -> relevance grade (1-100) for the query
+    @abstractmethod
+    def grade(self, query: str, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        ...
+
+    # Load any local model ahead of the first query; returns seconds per model
+    def warm_up(self) -> Dict[str, float]:
+        return {}
+
+
+# Local cross-encoder reranker. Query/document pairs are scored in batches and the logits
+# are mapped onto 1-100 with grade = 1 + 99 * sigmoid((logit - logit_shift) / logit_scale),
+# so logit_shift lands on grade 50 (the filter threshold). The defaults (0, 1) are the
+# model's own probability; calibrate_cross_encoder fits both against reference grades
+class CrossEncoderGrader(DocumentGrader):
+
+    name = "cross-encoder"
+
+    # backend: torch | onnx | onnx-int8 (quantized weights, CPU); batch_size pairs per forward
+    # pass, max_length tokens per pair. The model is loaded on first use (or warm-up)
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 backend: str = "torch", batch_size: int = 16, max_length: int = 256,
+                 logit_shift: float = 0.0, logit_scale: float = 1.0):
+        if backend not in CROSS_ENCODER_BACKENDS:
+            raise ValueError(f"Unknown cross-encoder backend '{backend}', expected one of {CROSS_ENCODER_BACKENDS}")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # Calibration - the logit that maps to grade 50, and logit units per sigmoid unit
+        self.logit_shift = logit_shift
+        self.logit_scale = logit_scale
+        self._model = None
+        self._lock = threading.Lock()
+
+    # Load the cross-encoder (once, thread-safe) and return it
+    def load(self):
+        if self._model is not None:
+            return self._model
+
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                print(f"Loading cross-encoder: {self.model_name} (cpu, {self.backend})")
+                if self.backend == "torch":
+                    self._model = CrossEncoder(self.model_name, device="cpu", max_length=self.max_length)
+                else:
+                    model_kwargs = {"file_name": CROSS_ENCODER_INT8_FILE} if self.backend == "onnx-int8" else {}
+                    self._model = CrossEncoder(self.model_name, device="cpu", max_length=self.max_length,
+                                               backend="onnx", model_kwargs=model_kwargs)
+        return self._model
+
+    def warm_up(self) -> Dict[str, float]:
+        start = time.perf_counter()
+        self.load()
+        return {'cross_encoder': time.perf_counter() - start}
+
+    # Raw relevance logits for query/document pairs (no activation)
+    def _logits(self, pairs: List[List[str]]) -> List[float]:
+        import torch
+
+        model = self.load()
+        try:
+            scores = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False,
+                                   activation_fn=torch.nn.Identity())
+        except TypeError:
+            # sentence-transformers < 4 names the argument activation_fct
+            scores = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False,
+                                   activation_fct=torch.nn.Identity())
+        return [float(score) for score in scores]
+
+    # Map a logit onto the 1-100 grade scale
+    def to_grade(self, logit: float) -> int:
+        z = (logit - self.logit_shift) / self.logit_scale
+        probability = 1.0 / (1.0 + math.exp(-max(min(z, 50.0), -50.0)))
+        return max(1, min(100, round(1 + 99 * probability)))
+
+    def grade(self, query: str, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        if not documents:
+            return {}
+
+        logits = self._logits([[query, doc['text']] for doc in documents])
+        return {doc['id']: self.to_grade(logit) for doc, logit in zip(documents, logits)}
+
+
+# Single structured-output LLM call over text previews of all documents
+class LLMGrader(DocumentGrader):
+
+    name = "llm"
+
+    # llm: LangChain chat model; response_schema: Pydantic schema with grades: [{id, grade}];
+    # text_preview_length: characters of each document shown to the LLM
+    def __init__(self, llm, response_schema, text_preview_length: int = 250):
+        self.llm = llm
+        self.response_schema = response_schema
+        self.text_preview_length = text_preview_length
+
+    def grade(self, query: str, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        if not documents:
+            return {}
+
+        # Build concise prompt
+        prompt = f"Rate document relevance to query (1-100):\nQuery: {query}\n\nDocuments:\n"
+
+        for doc in documents:
+            text_preview = doc['text'][:self.text_preview_length]
+            prompt += f"ID: {doc['id']}\nText: {text_preview}...\n\n"
+
+        prompt += "Return grades for each document by ID."
+
+        llm_response = self.llm.with_structured_output(self.response_schema).invoke(prompt)
+        return {doc.id: doc.grade for doc in llm_response.grades}
+
+
+# Try graders in order; the first one that succeeds provides the grades
+class FallbackGrader(DocumentGrader):
+
+    def __init__(self, graders: List[DocumentGrader]):
+        if not graders:
+            raise ValueError("At least one grader is required")
+        self.graders = graders
+        self.name = " -> ".join(grader.name for grader in graders)
+        self.last_used: Optional[str] = None
+
+    def warm_up(self) -> Dict[str, float]:
+        timings = {}
+        for grader in self.graders:
+            timings.update(grader.warm_up())
+        return timings
+
+    def grade(self, query: str, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        last_error = None
+        for grader in self.graders:
+            try:
+                grades = grader.grade(query, documents)
+                self.last_used = grader.name
+                return grades
+            except Exception as e:
+                print(f"{grader.name} grading failed: {e}")
+                last_error = e
+        raise last_error
+
+
+# Least-squares fit of (logit_shift, logit_scale) so cross-encoder grades follow reference
+# grades (1-100). Each grade is inverted to the sigmoid input it needs, z = log(p / (1 - p))
+# with p = (grade - 1) / 99 clipped to [0.01, 0.99], and logit = shift + scale * z is fitted
+# by linear regression
+def fit_logit_calibration(logits: Sequence[float], grades: Sequence[float]) -> Tuple[float, float]:
+    if len(logits) != len(grades) or len(logits) < 2:
+        raise ValueError("Calibration needs at least two logit/grade pairs")
+
+    targets = []
+    for grade in grades:
+        p = min(max((float(grade) - 1) / 99, 0.01), 0.99)
+        targets.append(math.log(p / (1 - p)))
+
+    mean_z = sum(targets) / len(targets)
+    mean_logit = sum(logits) / len(logits)
+    variance = sum((z - mean_z) ** 2 for z in targets)
+    covariance = sum((z - mean_z) * (logit - mean_logit) for z, logit in zip(targets, logits))
+    if variance == 0 or covariance <= 0:
+        raise ValueError("Reference grades do not increase with the logits - cannot calibrate")
+
+    scale = covariance / variance
+    return mean_logit - scale * mean_z, scale
+
+
+# Fit the cross-encoder's logit mapping to a reference grader (e.g. the LLM grader) on
+# (query, documents) samples and apply it. Returns the fitted logit_shift / logit_scale
+# (set them as CROSS_ENCODER_LOGIT_SHIFT / CROSS_ENCODER_LOGIT_SCALE) and the pairs used
+def calibrate_cross_encoder(cross_encoder: CrossEncoderGrader, reference: DocumentGrader,
+                            samples: List[Tuple[str, List[Dict[str, Any]]]]) -> Dict[str, float]:
+    logits, grades = [], []
+    for query, documents in samples:
+        if not documents:
+            continue
+        reference_grades = reference.grade(query, documents)
+        pair_logits = cross_encoder._logits([[query, doc['text']] for doc in documents])
+        for doc, logit in zip(documents, pair_logits):
+            if doc['id'] in reference_grades:
+                logits.append(logit)
+                grades.append(reference_grades[doc['id']])
+
+    shift, scale = fit_logit_calibration(logits, grades)
+    cross_encoder.logit_shift = shift
+    cross_encoder.logit_scale = scale
+    return {'logit_shift': shift, 'logit_scale': scale, 'pairs': len(logits)}
+
+
+# Grader chain for a DOCUMENT_GRADER setting: llm, or cross-encoder (LLM fallback when an
+# llm is given); cross_encoder_kwargs are CrossEncoderGrader settings
+def build_document_grader(kind: str, llm=None, response_schema=None,
+                          text_preview_length: int = 250, **cross_encoder_kwargs) -> DocumentGrader:
+    llm_grader = LLMGrader(llm, response_schema, text_preview_length) if llm is not None else None
+
+    if kind == "llm":
+        if llm_grader is None:
+            raise ValueError("LLM grader requires an llm and a response schema")
+        return llm_grader
+
+    if kind == "cross-encoder":
+        cross_encoder = CrossEncoderGrader(**cross_encoder_kwargs)
+        return FallbackGrader([cross_encoder, llm_grader]) if llm_grader else cross_encoder
+
+    raise ValueError(f"Unknown grader '{kind}', expected cross-encoder or llm")
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Similarity-weighted label voting for Path B.
+
+Replaces the LLM relevance filter in top_k_filter: hits vote for their
+status label with their similarity, and hits of labels with enough
+support are kept. Results whose label distribution is too flat to call
+(small margin between the top two labels) are flagged for escalation.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# Labels that are always kept when similar enough, however the vote goes
+DEFAULT_RISK_LABELS = ("Suicidal",)
+
+
+class LabelVoter:
+    """Vectorized status vote over semantic_search_b results."""
+
+    def __init__(self, min_similarity: float = 0.25, min_label_share: float = 0.3,
+                 margin_threshold: float = 0.15, risk_labels: Sequence[str] = DEFAULT_RISK_LABELS):
+        """
+        Initialize the voter.
+
+        Args:
+            min_similarity: Hits below this similarity neither vote nor get selected
+            min_label_share: Labels with at least this share of the vote are kept
+            margin_threshold: Top-label share minus runner-up share below which
+                the vote is ambiguous (escalated)
+            risk_labels: Labels kept whenever a hit clears min_similarity
+        """
+        self.min_similarity = min_similarity
+        self.min_label_share = min_label_share
+        self.margin_threshold = margin_threshold
+        self.risk_labels = set(risk_labels)
+
+    def vote(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Score hits by similarity per status and select the supported ones.
+
+        Args:
+            results: Hits with 'id', 'similarity', 'status' and 'text'
+
+        Returns:
+            Dict with selected 'results' (input order), label 'distribution',
+            'top_label', 'margin' and 'escalate' (ambiguous vote)
+        """
+        if not results:
+            return {'results': [], 'distribution': {}, 'top_label': None, 'margin': 0.0, 'escalate': False}
+
+        similarity = np.asarray([result['similarity'] for result in results], dtype=np.float32)
+        labels, label_index = np.unique([result['status'] for result in results], return_inverse=True)
+
+        # Each hit above the floor votes for its label with its similarity
+        weights = np.where(similarity >= self.min_similarity, similarity, 0.0)
+        label_scores = np.bincount(label_index, weights=weights, minlength=len(labels))
+        total = label_scores.sum()
+
+        if total <= 0:
+            # Nothing similar enough to vote - let the caller decide
+            return {'results': [], 'distribution': {}, 'top_label': None, 'margin': 0.0, 'escalate': True}
+
+        shares = label_scores / total
+        order = np.argsort(-shares)
+        margin = float(shares[order[0]] - (shares[order[1]] if len(order) > 1 else 0.0))
+
+        # Keep hits of well-supported labels and of risk labels, above the similarity floor
+        supported = (shares >= self.min_label_share)
+        supported[order[0]] = True
+        risk = np.isin(labels, list(self.risk_labels))
+        keep = (similarity >= self.min_similarity) & (supported | risk)[label_index]
+
+        return {
+            'results': [results[i] for i in np.flatnonzero(keep)],
+            'distribution': {str(label): float(share) for label, share in zip(labels, shares)},
+            'top_label': str(labels[order[0]]),
+            'margin': margin,
+            'escalate': margin < self.margin_threshold
+        }
\ No newline at end of file